@@ -0,0 +1,170 @@
+"""
+Per-button effect rendering with NumPy
+Effects are applied once to whole sample buffers and cached, never at play time
+"""
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+
+# Supported effect parameters and their neutral values
+EFFECT_DEFAULTS = {
+    "gain_db": 0.0,       # Output gain in decibels
+    "fade_in_ms": 0,      # Linear fade-in length
+    "fade_out_ms": 0,     # Linear fade-out length
+    "speed": 1.0,         # Playback rate (changes pitch, like a tape)
+    "lowpass_hz": 0,      # Low-pass cutoff, 0 = off
+    "highpass_hz": 0,     # High-pass cutoff, 0 = off
+}
+
+# Accepted range for each parameter (effects also arrive from /ws clients)
+EFFECT_LIMITS = {
+    "gain_db": (-60.0, 24.0),
+    "fade_in_ms": (0, 60000),
+    "fade_out_ms": (0, 60000),
+    "speed": (0.25, 4.0),
+    "lowpass_hz": (0, 96000),
+    "highpass_hz": (0, 96000),
+}
+
+# Steepness of the low/high-pass filters (Butterworth order)
+FILTER_ORDER = 4
+
+# Cutoffs are kept just below Nyquist (half the sample rate)
+MAX_CUTOFF_RATIO = 0.95
+
+_hash_cache: Dict[Tuple[str, int, int], str] = {}
+
+
+def normalize_effects(effects: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep only known, non-neutral effect parameters, clamped to EFFECT_LIMITS
+
+    Args:
+        effects: Raw 'effects' dict from a button config
+
+    Returns:
+        Dict with typed values; empty when the sound plays unmodified
+    """
+    normalized = {}
+    for name, raw_value in (effects or {}).items():
+        if name not in EFFECT_DEFAULTS:
+            continue
+        try:
+            value = type(EFFECT_DEFAULTS[name])(raw_value)
+        except (TypeError, ValueError, OverflowError):
+            continue
+        if not math.isfinite(value) or (name == "speed" and value <= 0):
+            continue
+        low, high = EFFECT_LIMITS[name]
+        value = min(max(value, low), high)
+        if value != EFFECT_DEFAULTS[name]:
+            normalized[name] = value
+    return normalized
+
+
+def source_hash(path: Path, memo_only: bool = False) -> Optional[str]:
+    """
+    Content hash of a sound file, memoized on path/size/mtime
+
+    Args:
+        path: Sound file path
+        memo_only: Return None instead of reading the file if it isn't memoized
+
+    Returns:
+        Hex SHA-1 digest of the file contents
+    """
+    stat = os.stat(path)
+    memo_key = (str(path), stat.st_size, stat.st_mtime_ns)
+    digest = _hash_cache.get(memo_key)
+    if digest is None and memo_only:
+        return None
+    if digest is None:
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        _hash_cache[memo_key] = digest
+    return digest
+
+
+def variant_key(digest: str, effects: Dict[str, Any], mixer_format: Tuple) -> str:
+    """Cache key for a rendered variant: source hash + effect params + mixer format"""
+    params = json.dumps({"fx": effects, "mixer": list(mixer_format)}, sort_keys=True)
+    return f"{digest}-{hashlib.sha1(params.encode()).hexdigest()[:16]}"
+
+
+def _filter_response(freqs: np.ndarray, lowpass_hz: float, highpass_hz: float) -> np.ndarray:
+    """Butterworth magnitude response for the requested low/high-pass cutoffs"""
+    response = np.ones_like(freqs)
+    if lowpass_hz > 0:
+        response /= np.sqrt(1.0 + (freqs / lowpass_hz) ** (2 * FILTER_ORDER))
+    if highpass_hz > 0:
+        # Far below the cutoff the ratio overflows to inf, i.e. a response of 0
+        with np.errstate(divide='ignore', over='ignore'):
+            ratio = np.where(freqs > 0, highpass_hz / np.maximum(freqs, 1e-9), np.inf)
+            response /= np.sqrt(1.0 + ratio ** (2 * FILTER_ORDER))
+    return response
+
+
+def render(samples: np.ndarray, sample_rate: int, effects: Dict[str, Any]) -> np.ndarray:
+    """
+    Apply an effect chain to a sample buffer
+
+    Args:
+        samples: Integer PCM array, shape (frames,) or (frames, channels)
+        sample_rate: Sample rate in Hz
+        effects: Normalized effect parameters (see normalize_effects)
+
+    Returns:
+        New C-contiguous array with the same dtype and channel layout
+    """
+    if not effects or len(samples) == 0:
+        return samples
+
+    dtype = samples.dtype
+    info = np.iinfo(dtype)
+    mono = samples.ndim == 1
+    audio = samples.reshape(len(samples), -1).astype(np.float32) / (info.max + 1)
+
+    # Speed/pitch: resample with linear interpolation
+    speed = effects.get("speed", 1.0)
+    if speed != 1.0:
+        frames = len(audio)
+        new_frames = max(1, int(frames / speed))
+        positions = np.linspace(0, frames - 1, new_frames, dtype=np.float32)
+        index = np.arange(frames, dtype=np.float32)
+        audio = np.stack([np.interp(positions, index, audio[:, ch])
+                          for ch in range(audio.shape[1])], axis=1).astype(np.float32)
+
+    # Low/high-pass: shape the spectrum in one FFT pass
+    max_cutoff = sample_rate / 2 * MAX_CUTOFF_RATIO
+    lowpass = min(effects.get("lowpass_hz", 0), max_cutoff)
+    highpass = min(effects.get("highpass_hz", 0), max_cutoff)
+    if lowpass > 0 or highpass > 0:
+        spectrum = np.fft.rfft(audio, axis=0)
+        freqs = np.fft.rfftfreq(len(audio), d=1.0 / sample_rate).astype(np.float32)
+        spectrum *= _filter_response(freqs, lowpass, highpass)[:, None]
+        audio = np.fft.irfft(spectrum, n=len(audio), axis=0).astype(np.float32)
+
+    gain_db = effects.get("gain_db", 0.0)
+    if gain_db:
+        audio *= np.float32(10 ** (gain_db / 20))
+
+    # Fades: linear ramps over the first/last N frames
+    fade_in = min(len(audio), int(sample_rate * effects.get("fade_in_ms", 0) / 1000))
+    if fade_in > 0:
+        audio[:fade_in] *= np.linspace(0, 1, fade_in, dtype=np.float32)[:, None]
+    fade_out = min(len(audio), int(sample_rate * effects.get("fade_out_ms", 0) / 1000))
+    if fade_out > 0:
+        audio[-fade_out:] *= np.linspace(1, 0, fade_out, dtype=np.float32)[:, None]
+
+    scaled = np.clip(audio * (info.max + 1), info.min, info.max).astype(dtype)
+    if mono:
+        scaled = scaled[:, 0]
+    return np.ascontiguousarray(scaled)
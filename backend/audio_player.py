@@ -2,24 +2,57 @@
 Audio playback handler with device selection support
 """
 import os
+import time
+import logging
 import pygame
+import numpy as np
+from collections import OrderedDict
 from pathlib import Path
-from threading import Thread
+from threading import Thread, Lock, Event, get_ident
+from typing import Dict, Any, List, Optional, Tuple
+
+from audio_effects import normalize_effects, render, source_hash, variant_key
+from waveform import compute_meter_envelope, METER_RATE
+
+logger = logging.getLogger(__name__)
+
+# Rendered effect variants are persisted here so restarts skip re-rendering
+DEFAULT_CACHE_DIR = Path(__file__).parent / "sounds" / ".cache"
+
+# Simultaneous sounds (each press gets its own mixer channel)
+MIXER_CHANNELS = 32
 
 class AudioPlayer:
-    def __init__(self, base_path: str = "", audio_device: str = None):
+    def __init__(self, base_path: str = "", audio_device: str = None,
+                 cache_dir: str = None, cache_budget_mb: int = 256):
         """
         Initialize audio player
         
         Args:
             base_path: Base path for resolving sound file paths
             audio_device: Specific audio device name (optional)
+            cache_dir: Directory for rendered effect variants (optional)
+            cache_budget_mb: Memory budget for decoded/rendered sounds
         """
         self.base_path = Path(base_path)
         self.audio_device = audio_device
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_budget = cache_budget_mb * 1024 * 1024
+        
+        # Variant key -> (Sound, size in bytes, meter envelope), least recently used first
+        self._sounds: "OrderedDict[str, tuple]" = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = Lock()
+        
+        # Variant key -> Event set when the render in progress finishes
+        self._inflight: Dict[str, Event] = {}
+        
+        # Button ID -> (Channel, Sound, start time, meter envelope, volume) for playing buttons
+        self._active: Dict[int, tuple] = {}
         
         # Initialize pygame mixer
         pygame.mixer.init()
+        pygame.mixer.set_num_channels(MIXER_CHANNELS)
     
     def set_audio_device(self, device_name: str):
         """Set the audio output device"""
@@ -35,37 +68,255 @@ class AudioPlayer:
             "Speakers",
         ]
     
-    def play_sound(self, sound_path: str):
+    def resolve_path(self, sound_path: str) -> Path:
+        """Resolve a configured sound path (relative or absolute)"""
+        if os.path.isabs(sound_path):
+            return Path(sound_path)
+        return self.base_path / sound_path
+    
+    def _cache_get(self, key: str) -> Optional[Tuple[pygame.mixer.Sound, np.ndarray]]:
+        """Look up a ready-to-play sound and its meter envelope, marking it recently used"""
+        with self._lock:
+            entry = self._sounds.get(key)
+            if entry is None:
+                return None
+            self._sounds.move_to_end(key)
+            return entry[0], entry[2]
+    
+    @staticmethod
+    def _sound_bytes(sound: pygame.mixer.Sound) -> int:
+        """Decoded size of a sound in the mixer's format"""
+        frequency, fmt, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * (abs(fmt) // 8)
+    
+    def _cache_put(self, key: str, sound: pygame.mixer.Sound,
+                   cold: bool = False) -> Tuple[pygame.mixer.Sound, np.ndarray]:
+        """
+        Store a sound, evicting least recently used ones over budget
+        
+        Cold entries go in as least recently used, so they only ever take
+        free space and are the first to go when the budget is exceeded.
+        """
+        size = self._sound_bytes(sound)
+        envelope = compute_meter_envelope(pygame.sndarray.samples(sound), pygame.mixer.get_init()[0])
+        with self._lock:
+            if key in self._sounds:
+                entry = self._sounds[key]
+                return entry[0], entry[2]
+            self._sounds[key] = (sound, size, envelope)
+            if cold:
+                self._sounds.move_to_end(key, last=False)
+            self._cache_bytes += size
+            while self._cache_bytes > self.cache_budget and len(self._sounds) > 1:
+                _, (_, evicted_size, _) = self._sounds.popitem(last=False)
+                self._cache_bytes -= evicted_size
+        return sound, envelope
+    
+    def cache_key(self, full_path: Path, effects: Dict[str, Any], memo_only: bool = False) -> Optional[str]:
+        """
+        Cache key for a sound file rendered with the given effects
+        
+        With memo_only, returns None rather than hashing a file seen for the
+        first time (keeps file reads off the caller's thread).
+        """
+        digest = source_hash(full_path, memo_only=memo_only)
+        if digest is None:
+            return None
+        return variant_key(digest, effects, pygame.mixer.get_init())
+    
+    def get_sound(self, full_path: Path, effects: Dict[str, Any] = None) -> pygame.mixer.Sound:
+        """
+        Get a playable sound with effects applied, rendering it on a cache miss
+        
+        Args:
+            full_path: Resolved sound file path
+            effects: Normalized effect parameters (see audio_effects)
+        """
+        return self._get_entry(full_path, effects)[0]
+    
+    def _get_entry(self, full_path: Path, effects: Dict[str, Any] = None,
+                   cold: bool = False) -> Tuple[pygame.mixer.Sound, np.ndarray]:
+        """Get (sound, meter envelope), rendering on a cache miss"""
+        effects = effects or {}
+        key = self.cache_key(full_path, effects)
+        while True:
+            entry = self._cache_get(key)
+            if entry is not None:
+                return entry
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    done = self._inflight[key] = Event()
+                    break
+            # Someone else is rendering this variant: use their result
+            # (or render it ourselves if theirs failed)
+            pending.wait()
+        
+        try:
+            return self._render(full_path, effects, key, cold)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
+    
+    def _render(self, full_path: Path, effects: Dict[str, Any], key: str,
+                cold: bool) -> Tuple[pygame.mixer.Sound, np.ndarray]:
+        """Decode (and apply effects to) a sound, then cache it"""
+        rendered_path = self.cache_dir / f"{key}.npy"
+        if effects and rendered_path.exists():
+            sound = pygame.sndarray.make_sound(np.load(rendered_path))
+        else:
+            sound = pygame.mixer.Sound(str(full_path))
+            if effects:
+                samples = pygame.sndarray.array(sound)
+                rendered = render(samples, pygame.mixer.get_init()[0], effects)
+                sound = pygame.sndarray.make_sound(rendered)
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                # Unique temp name: the GUI and other instances share this folder
+                tmp_path = rendered_path.with_name(f"{key}.{os.getpid()}-{get_ident()}.tmp.npy")
+                np.save(tmp_path, rendered)
+                os.replace(tmp_path, rendered_path)
+        
+        return self._cache_put(key, sound, cold=cold)
+    
+    def prewarm(self, buttons: List[Dict[str, Any]], budget_bytes: int = None,
+                cancel: Event = None, after: Optional[Thread] = None) -> Thread:
+        """
+        Decode and render every button's sound in the background
+        
+        Args:
+            buttons: Button configs from config.json
+            budget_bytes: Speculative mode (e.g. profiles that aren't active yet):
+                decode at most this many bytes, only into free cache space,
+                without promoting or evicting sounds already cached
+            cancel: Event that stops the pass early when set
+            after: Thread to wait for first (e.g. a higher-priority prewarm)
+        """
+        def _prewarm():
+            if after:
+                after.join()
+            used = 0
+            for button in buttons:
+                if cancel is not None and cancel.is_set():
+                    return
+                if not button.get("sound"):
+                    continue
+                full_path = self.resolve_path(button["sound"])
+                try:
+                    if not full_path.exists():
+                        continue
+                    effects = normalize_effects(button.get("effects"))
+                    if budget_bytes is None:
+                        self.get_sound(full_path, effects)
+                        continue
+                    
+                    # Hash outside the lock: presses and the meter need it meanwhile
+                    key = self.cache_key(full_path, effects)
+                    with self._lock:
+                        if key in self._sounds:
+                            continue
+                        if used >= budget_bytes or self._cache_bytes >= self.cache_budget:
+                            return
+                    used += self._sound_bytes(self._get_entry(full_path, effects, cold=True)[0])
+                except Exception as e:
+                    logger.error("Error pre-rendering %s: %s", full_path, e)
+        
+        thread = Thread(target=_prewarm, daemon=True)
+        thread.start()
+        return thread
+    
+    def play_sound(self, sound_path: str, effects: Dict[str, Any] = None, button_id: int = None,
+                   volume: float = 1.0):
         """
         Play a sound file in a non-blocking way
         
         Args:
             sound_path: Path to sound file (relative or absolute)
+            effects: Button effect settings (gain, fades, speed, filters)
+            button_id: Button being played, for playback state (optional)
+            volume: Channel volume 0-1 for this play only
         """
+        effects = normalize_effects(effects)
+        full_path = self.resolve_path(sound_path)
+        
+        # Fast path: already decoded/rendered, plain and effected cost the same
+        try:
+            key = self.cache_key(full_path, effects, memo_only=True)
+        except OSError:
+            logger.warning("Sound file not found: %s", full_path)
+            return
+        entry = self._cache_get(key) if key else None
+        if entry is not None:
+            self._start(entry, button_id, volume)
+            return
+        
         def _play():
+            # Hashing, decoding and rendering all happen here, never on the caller's thread
             try:
-                # Resolve path
-                if os.path.isabs(sound_path):
-                    full_path = Path(sound_path)
-                else:
-                    full_path = self.base_path / sound_path
-                
-                # Check if file exists
-                if not full_path.exists():
-                    print(f"Sound file not found: {full_path}")
-                    return
-                
-                # Load and play sound
-                pygame.mixer.music.load(str(full_path))
-                pygame.mixer.music.play()
-                
-                # Wait for sound to finish
-                while pygame.mixer.music.get_busy():
-                    pygame.time.Clock().tick(10)
-                    
+                self._start(self._get_entry(full_path, effects), button_id, volume)
+            except OSError:
+                logger.warning("Sound file not found: %s", full_path)
             except Exception as e:
-                print(f"Error playing sound: {e}")
+                logger.error("Error playing sound: %s", e)
         
-        # Play in separate thread to avoid blocking
+        # Decode/render in separate thread to avoid blocking
         thread = Thread(target=_play, daemon=True)
         thread.start()
+
+    def _start(self, entry: Tuple[pygame.mixer.Sound, np.ndarray], button_id: Optional[int],
+               volume: float = 1.0) -> None:
+        """Play a cached sound and track it for playback state"""
+        sound, envelope = entry
+        channel = sound.play()
+        if channel is not None and volume < 1.0:
+            # Per-channel, so sounds already playing keep their volume
+            channel.set_volume(max(volume, 0.0))
+        if channel is not None and button_id is not None:
+            with self._lock:
+                self._active[button_id] = (channel, sound, time.monotonic(), envelope, volume)
+    
+    def playback_snapshot(self) -> Dict[str, Any]:
+        """
+        Current per-button progress and combined output levels
+        
+        Levels are estimated from each playing sound's precomputed meter
+        envelope, so this never touches sample data.
+        
+        Returns:
+            {"progress": {button_id: 0..1}, "rms": 0..1, "peak": 0..1}
+        """
+        now = time.monotonic()
+        progress = {}
+        rms_squared = 0.0
+        peak = 0.0
+        finished = []
+        
+        with self._lock:
+            active = list(self._active.items())
+        for button_id, playing in active:
+            channel, sound, started, envelope, volume = playing
+            if not channel.get_busy() or channel.get_sound() is not sound:
+                finished.append((button_id, playing))
+                continue
+            elapsed = now - started
+            progress[button_id] = min(elapsed / max(sound.get_length(), 1e-3), 1.0)
+            window = min(int(elapsed * METER_RATE), len(envelope) - 1)
+            rms_squared += (envelope[window, 0] / 255 * volume) ** 2
+            peak += envelope[window, 1] / 255 * volume
+        
+        if finished:
+            with self._lock:
+                for button_id, playing in finished:
+                    # Leave it if the button was retriggered meanwhile
+                    if self._active.get(button_id) is playing:
+                        del self._active[button_id]
+        
+        return {"progress": progress, "rms": min(rms_squared ** 0.5, 1.0), "peak": min(peak, 1.0)}
+    
+    def shutdown(self):
+        """Stop playback and release the mixer"""
+        try:
+            pygame.mixer.stop()
+            pygame.mixer.quit()
+        except pygame.error:
+            pass
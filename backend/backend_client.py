@@ -0,0 +1,186 @@
+"""
+Live control channel from the GUI to the running backend
+Runs its own asyncio loop on a background thread so Tk never blocks
+"""
+import asyncio
+import json
+import logging
+import time
+from threading import Thread, Lock
+from typing import Callable, Dict, Any, Optional, Tuple
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+# Edits are coalesced for this long before being sent as one batch
+DEBOUNCE_SECONDS = 0.25
+PING_INTERVAL = 2.0
+RECONNECT_MAX = 10.0
+
+
+class BackendClient:
+    def __init__(self, host: str, port: int, api_key: str):
+        """
+        Initialize backend client
+
+        Args:
+            host: Backend host
+            port: Backend port
+            api_key: Backend API key
+        """
+        self.url = f"ws://{host}:{port}/ws?api_key={api_key}"
+        self.connected = False
+        self.latency_ms: Optional[float] = None
+        self.edits_sent = 0
+        # Active profile as last reported by the backend
+        self.active_profile: Optional[str] = None
+        # Called with the config dict on every 'config' broadcast (on the client thread)
+        self.on_config: Optional[Callable[[Dict[str, Any]], None]] = None
+
+        # (profile, button ID) -> field -> latest value, waiting to be flushed
+        self._pending: Dict[Tuple[Optional[str], int], Dict[str, Any]] = {}
+        self._pending_lock = Lock()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._connection = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._loop.run_forever, daemon=True)
+
+    def start(self) -> None:
+        """Start connecting in the background"""
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    def stop(self) -> None:
+        """Flush pending edits and close the connection"""
+        future = asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        try:
+            future.result(timeout=2)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def queue_edit(self, button_id: int, field: str, value: Any, profile: str = None) -> None:
+        """
+        Queue a button edit; rapid edits are debounced into one batch
+
+        Args:
+            button_id: Button ID from config
+            field: Button field ('name', 'key', 'sound', 'effects', ...)
+            value: New value
+            profile: Profile the button belongs to (the backend's active one if None)
+        """
+        with self._pending_lock:
+            self._pending.setdefault((profile, button_id), {})[field] = value
+        self._loop.call_soon_threadsafe(self._schedule_flush)
+
+    def preview(self, sound: str, effects: Dict[str, Any] = None) -> bool:
+        """Play a sound through the backend's mixer; False if not connected"""
+        if not self.connected:
+            return False
+        self._send({"type": "preview", "sound": sound, "effects": effects or {}})
+        return True
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        """Send a message from any thread"""
+        asyncio.run_coroutine_threadsafe(self._send_async(message), self._loop)
+
+    async def _send_async(self, message: Dict[str, Any]) -> bool:
+        connection = self._connection
+        if connection is None:
+            return False
+        try:
+            await connection.send(json.dumps(message))
+            return True
+        except websockets.WebSocketException:
+            return False
+
+    def _schedule_flush(self) -> None:
+        """(Re)start the debounce timer (runs on the client loop)"""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        self._flush_handle = self._loop.call_later(
+            DEBOUNCE_SECONDS, lambda: asyncio.ensure_future(self._flush()))
+
+    async def _flush(self) -> None:
+        """Send all pending edits as one config_patch per profile"""
+        self._flush_handle = None
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        by_profile: Dict[Optional[str], list] = {}
+        for (profile, button_id), fields in pending.items():
+            by_profile.setdefault(profile, []).append({"button_id": button_id, "fields": fields})
+        for profile, edits in by_profile.items():
+            message = {"type": "config_patch", "edits": edits}
+            if profile is not None:
+                message["active_profile"] = profile
+            if await self._send_async(message):
+                self.edits_sent += len(edits)
+                continue
+            # Keep them for the next connection, newer values win
+            with self._pending_lock:
+                for edit in edits:
+                    key = (profile, edit["button_id"])
+                    self._pending[key] = {**edit["fields"], **self._pending.get(key, {})}
+
+    async def _run(self) -> None:
+        """Connection loop with reconnect backoff"""
+        backoff = 0.5
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None,
+                                              open_timeout=3, close_timeout=1) as connection:
+                    self._connection = connection
+                    self.connected = True
+                    backoff = 0.5
+                    if self._pending:
+                        await self._flush()
+                    pinger = asyncio.ensure_future(self._ping(connection))
+                    try:
+                        async for message in connection:
+                            self._handle(message)
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                logger.debug("Backend unavailable: %s", e)
+            finally:
+                self._connection = None
+                self.connected = False
+                self.latency_ms = None
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX)
+
+    async def _ping(self, connection) -> None:
+        """Measure round-trip latency with application-level pings"""
+        while True:
+            try:
+                await connection.send(json.dumps({"type": "ping", "t": time.perf_counter()}))
+            except websockets.WebSocketException:
+                return
+            await asyncio.sleep(PING_INTERVAL)
+
+    def _handle(self, message) -> None:
+        """Handle messages from the backend"""
+        try:
+            data = json.loads(message)
+        except (TypeError, ValueError):
+            return
+        if data.get("type") == "pong":
+            rtt = (time.perf_counter() - data.get("t", 0)) * 1000
+            self.latency_ms = rtt if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * rtt
+        elif data.get("type") == "config" and isinstance(data.get("data"), dict):
+            self.active_profile = data["data"].get("active_profile")
+            if self.on_config:
+                try:
+                    self.on_config(data["data"])
+                except Exception as e:
+                    logger.error("Config callback failed: %s", e)
+
+    async def _shutdown(self) -> None:
+        if self._flush_handle:
+            self._flush_handle.cancel()
+        await self._flush()
+        if self._connection is not None:
+            await self._connection.close()
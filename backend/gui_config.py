@@ -6,12 +6,20 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import json
 import os
-import subprocess
 import webbrowser
 import socket
-import psutil
+import queue
+import threading
+import traceback
+import urllib.parse
+import urllib.request
 from pathlib import Path
 
+from supervisor import Supervisor
+from backend_client import BackendClient
+from sound_library import SoundLibrary
+import waveform
+
 try:
     import qrcode
     from PIL import Image, ImageTk
@@ -29,23 +37,88 @@ class SounDeckGUI:
         self.config_path = Path(__file__).parent.parent / "config.json"
         self.config = self.load_config()
         
+        self.supervisor = Supervisor()
+        self.supervisor.register("gui")
+        
+        # Button ID -> (canvas, sound label) for waveform previews
+        self.waveform_widgets = {}
+        
+        # Callables from background threads, run on the Tk main loop
+        self.ui_queue = queue.Queue()
+        
+        # Live connection to the running backend (edits apply without restart)
+        backend = self.config.get("backend", {})
+        self.backend_client = BackendClient("127.0.0.1", backend.get("port", 8000),
+                                            backend.get("api_key", ""))
+        self.backend_client.on_config = lambda data: self.ui_queue.put(lambda: self.apply_backend_config(data))
+        self.backend_client.start()
+        
+        # Local sound library index (read-only fallback when the backend is offline)
+        self.library = None
+        
         self.setup_ui()
+        self.load_waveforms()
+        self.process_ui_queue()
+        self.update_connection_status()
         
     def load_config(self):
         """Load configuration from config.json"""
-        if self.config_path.exists():
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"buttons": []}
+        if not self.config_path.exists():
+            return {"buttons": []}
+        with open(self.config_path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        
+        # Same rule as the backend: top-level buttons are the active profile's,
+        # unless there are none and the profile carries its own
+        active = (config.get("profiles") or {}).get(config.get("active_profile"))
+        if active is not None:
+            own_buttons = active.pop("buttons", None)
+            if not config.get("buttons"):
+                config["buttons"] = own_buttons or []
+        return config
     
     def save_config(self):
-        """Save configuration to config.json"""
+        """Save configuration to config.json on a background thread"""
+        snapshot = json.dumps(self.config, indent=2)
+        
+        def _save():
+            try:
+                tmp_path = self.config_path.with_suffix(".json.tmp")
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    f.write(snapshot)
+                os.replace(tmp_path, self.config_path)
+                self.ui_queue.put(lambda: messagebox.showinfo("Success", "Configuration saved!"))
+            except Exception as e:
+                self.ui_queue.put(lambda err=e: messagebox.showerror("Error", f"Failed to save: {err}"))
+        
+        threading.Thread(target=_save, daemon=True).start()
+    
+    def process_ui_queue(self):
+        """Run callbacks queued by background threads (Tk isn't thread-safe)"""
         try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2)
-            messagebox.showinfo("Success", "Configuration saved!")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save: {e}")
+            while True:
+                try:
+                    callback = self.ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    callback()
+                except Exception:
+                    # One failing callback must not stop the queue for good
+                    print("UI callback failed:")
+                    traceback.print_exc()
+        finally:
+            self.root.after(50, self.process_ui_queue)
+    
+    def update_connection_status(self):
+        """Refresh the live backend connection indicator"""
+        client = self.backend_client
+        if client.connected:
+            latency = f" · {client.latency_ms:.1f} ms" if client.latency_ms is not None else ""
+            self.status_label.config(text=f"● Live{latency}", fg='#39FF14')
+        else:
+            self.status_label.config(text="○ Backend offline", fg='#888')
+        self.root.after(1000, self.update_connection_status)
     
     def setup_ui(self):
         """Setup the user interface"""
@@ -58,6 +131,11 @@ class SounDeckGUI:
                         bg='#1a1a1a', fg='#39FF14')
         title.pack(side=tk.LEFT)
         
+        self.status_label = tk.Label(header, text="", 
+                                   font=('Arial', 9),
+                                   bg='#1a1a1a', fg='#888')
+        self.status_label.pack(side=tk.LEFT, padx=10)
+        
         # Control buttons
         btn_frame = tk.Frame(header, bg='#1a1a1a')
         btn_frame.pack(side=tk.RIGHT)
@@ -76,6 +154,13 @@ class SounDeckGUI:
                            relief=tk.FLAT, padx=15, pady=5)
         kill_btn.pack(side=tk.LEFT, padx=5)
         
+        restart_btn = tk.Button(btn_frame, text="🔄 Restart Backend", 
+                           command=self.restart_backend,
+                           bg='#3a3a3a', fg='#39FF14',
+                           font=('Arial', 10, 'bold'),
+                           relief=tk.FLAT, padx=15, pady=5)
+        restart_btn.pack(side=tk.LEFT, padx=5)
+        
         # Connection info panel with QR code
         info_frame = tk.Frame(self.root, bg='#2a2a2a', relief=tk.RAISED, borderwidth=1)
         info_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
@@ -196,9 +281,52 @@ class SounDeckGUI:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
+        self.buttons_frame = scrollable_frame
+        self.build_button_grid()
+    
+    def build_button_grid(self):
+        """(Re)create the button widgets for the active profile"""
+        for child in self.buttons_frame.winfo_children():
+            child.destroy()
+        self.waveform_widgets.clear()
+        
         # Create button grid (4 columns x 6 rows = 24 buttons)
         for i, button_config in enumerate(self.config.get("buttons", [])):
-            self.create_button_widget(scrollable_frame, button_config, i)
+            self.create_button_widget(self.buttons_frame, button_config, i)
+    
+    def apply_backend_config(self, data):
+        """
+        Follow profile switches made elsewhere (runs on the Tk main loop)
+        
+        Keeps self.config in the config.json shape: the active profile's
+        buttons at top level, every other profile holding its own.
+        """
+        previous = self.config.get("active_profile")
+        active = data.get("active_profile")
+        if not active or active == previous:
+            return
+        
+        profiles = self.config.setdefault("profiles", {})
+        if previous:
+            profiles.setdefault(previous, {})["buttons"] = self.config.get("buttons", [])
+        profiles.setdefault(active, {}).pop("buttons", None)
+        self.config["active_profile"] = active
+        self.config["buttons"] = data.get("buttons", [])
+        
+        self.build_button_grid()
+        self.load_waveforms()
+    
+    def button_profile(self, button_config):
+        """Profile a button belongs to, so its edits can't land in another one"""
+        for name, profile in self.config.get("profiles", {}).items():
+            if any(button is button_config for button in profile.get("buttons", [])):
+                return name
+        return self.config.get("active_profile")
+    
+    def queue_edit(self, button_config, field, value):
+        """Send a button edit to the backend, tagged with the button's profile"""
+        self.backend_client.queue_edit(button_config.get('id'), field, value,
+                                       profile=self.button_profile(button_config))
     
     def create_button_widget(self, parent, button_config, index):
         """Create a widget for each button configuration"""
@@ -256,16 +384,215 @@ class SounDeckGUI:
                             font=('Arial', 10),
                             relief=tk.FLAT, width=3)
         sound_btn.pack(side=tk.RIGHT)
+        
+        preview_btn = tk.Button(sound_frame, text="▶",
+                              command=lambda: self.preview_sound(button_config),
+                              bg='#3a3a3a', fg='#39FF14',
+                              font=('Arial', 10),
+                              relief=tk.FLAT, width=2)
+        preview_btn.pack(side=tk.RIGHT, padx=(0, 2))
+        
+        # Waveform preview (peaks served by the running backend)
+        waveform_canvas = tk.Canvas(frame, height=24, bg='#1a1a1a',
+                                  highlightthickness=0)
+        waveform_canvas.pack(fill=tk.X, padx=5, pady=(2, 5))
+        self.waveform_widgets[button_config.get('id')] = (waveform_canvas, sound_label)
+    
+    def load_waveforms(self, button_ids=None):
+        """Fetch waveform peaks from the backend in the background"""
+        backend = self.config.get("backend", {})
+        base_url = f"http://127.0.0.1:{backend.get('port', 8000)}"
+        api_key = backend.get("api_key", "")
+        if button_ids is None:
+            button_ids = [b.get('id') for b in self.config.get("buttons", []) if b.get('sound')]
+        
+        def _fetch():
+            for button_id in button_ids:
+                request = urllib.request.Request(
+                    f"{base_url}/waveform/{button_id}?bins=128",
+                    headers={"Authorization": f"Bearer {api_key}"},
+                )
+                try:
+                    with urllib.request.urlopen(request, timeout=2) as response:
+                        duration_ms, levels = waveform.decode(response.read())
+                    self.ui_queue.put(lambda b=button_id, d=duration_ms, p=levels[-1]: self.draw_waveform(b, d, p))
+                except (OSError, ValueError):
+                    continue
+        
+        threading.Thread(target=_fetch, daemon=True).start()
+    
+    def draw_waveform(self, button_id, duration_ms, peaks):
+        """Draw a fetched waveform (runs on the Tk main loop)"""
+        widgets = self.waveform_widgets.get(button_id)
+        if not widgets:
+            return
+        canvas, sound_label = widgets
+        
+        canvas.delete('all')
+        width = max(canvas.winfo_width(), 1)
+        height = int(canvas['height'])
+        middle = height / 2
+        step = width / max(len(peaks), 1)
+        for i, peak in enumerate(peaks):
+            half = max(peak / 255 * middle, 0.5)
+            x = i * step
+            canvas.create_line(x, middle - half, x, middle + half, fill='#39FF14')
+        
+        sound_label.config(text=f"{sound_label.cget('text')} ({duration_ms / 1000:.1f}s)")
     
     def update_button_name(self, button_config, new_name):
         """Update button name"""
         button_config['name'] = new_name
+        self.queue_edit(button_config, 'name', new_name)
     
     def update_button_key(self, button_config, new_key):
         """Update button key binding"""
         button_config['key'] = new_key
+        self.queue_edit(button_config, 'key', new_key)
+    
+    def preview_sound(self, button_config):
+        """Play a button's sound through the backend's mixer"""
+        if not button_config.get('sound'):
+            return
+        if not self.backend_client.preview(button_config['sound'], button_config.get('effects')):
+            messagebox.showwarning("Preview", "Backend is not running.")
+    
+    def get_library(self):
+        """Open the shared sound library index (only the backend scans it)"""
+        if self.library is None:
+            project_dir = Path(__file__).parent.parent
+            folders = self.config.get("backend", {}).get("library_folders", ["backend/sounds"])
+            self.library = SoundLibrary([project_dir / folder for folder in folders])
+        return self.library
+    
+    def search_library(self, query, page, page_size):
+        """
+        Search the sound library through the backend (call off the Tk thread)
+        
+        Falls back to the last index on disk when the backend is offline.
+        """
+        backend = self.config.get("backend", {})
+        params = urllib.parse.urlencode({"q": query, "page": page, "page_size": page_size})
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{backend.get('port', 8000)}/library/search?{params}",
+            headers={"Authorization": f"Bearer {backend.get('api_key', '')}"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=2) as response:
+                return json.load(response)
+        except (OSError, ValueError):
+            result = self.get_library().search(query, page, page_size)
+            result["offline"] = True
+            return result
     
     def select_sound(self, button_config, sound_label):
+        """Open a searchable sound library picker"""
+        page_size = 100
+        state = {"page": 0, "results": [], "pending": None, "seq": 0}
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Select sound")
+        dialog.geometry("500x450")
+        dialog.configure(bg='#1a1a1a')
+        dialog.transient(self.root)
+        
+        search_var = tk.StringVar()
+        search_entry = tk.Entry(dialog, textvariable=search_var,
+                              bg='#3a3a3a', fg='white',
+                              font=('Arial', 11),
+                              relief=tk.FLAT, insertbackground='white')
+        search_entry.pack(fill=tk.X, padx=10, pady=10)
+        search_entry.focus_set()
+        
+        listbox = tk.Listbox(dialog, bg='#2a2a2a', fg='white',
+                           selectbackground='#39FF14', selectforeground='black',
+                           font=('Arial', 9), relief=tk.FLAT,
+                           activestyle='none')
+        listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+        
+        footer = tk.Frame(dialog, bg='#1a1a1a')
+        footer.pack(fill=tk.X, padx=10, pady=10)
+        status_label = tk.Label(footer, text="", bg='#1a1a1a', fg='#888',
+                              font=('Arial', 8))
+        status_label.pack(side=tk.LEFT)
+        
+        def run_search(status_only=False):
+            # Query on a worker thread; only the newest request updates the dialog
+            state["pending"] = None
+            state["seq"] += 1
+            seq = state["seq"]
+            query, page = search_var.get(), state["page"]
+            
+            def _search():
+                result = self.search_library(query, page, page_size)
+                self.ui_queue.put(lambda: show_results(seq, result, status_only))
+            
+            threading.Thread(target=_search, daemon=True).start()
+        
+        def show_results(seq, result, status_only):
+            if seq != state["seq"] or not dialog.winfo_exists():
+                return
+            # While the backend indexes, only the status line refreshes so the
+            # user's selection survives; the list refreshes once indexing ends
+            # (unless something is selected)
+            if not status_only or (not result.get("indexing") and not listbox.curselection()):
+                state["results"] = result["results"]
+                listbox.delete(0, tk.END)
+                for item in result["results"]:
+                    duration = f" ({item['duration_ms'] / 1000:.1f}s)" if item["duration_ms"] else ""
+                    tags = f"  [{item['tags']}]" if item["tags"] else ""
+                    listbox.insert(tk.END, f"{item['name']}{duration}{tags}")
+            
+            first = state["page"] * page_size
+            last = first + listbox.size()
+            note = " - indexing..." if result.get("indexing") else ""
+            if result.get("offline"):
+                note = " - backend offline, last index"
+            status_label.config(text=f"{first + 1 if last else 0}-{last} of {result['total']}{note}")
+            if result.get("indexing") and not state["pending"]:
+                state["pending"] = dialog.after(1500, lambda: run_search(status_only=True))
+        
+        def schedule_search(delay=150):
+            # Debounce keystrokes into one query
+            if state["pending"]:
+                dialog.after_cancel(state["pending"])
+            state["pending"] = dialog.after(delay, run_search)
+        
+        def on_query_changed(*args):
+            state["page"] = 0
+            schedule_search()
+        
+        def change_page(delta):
+            state["page"] = max(0, state["page"] + delta)
+            schedule_search(0)
+        
+        def choose(event=None):
+            selection = listbox.curselection()
+            if selection:
+                self.assign_sound(button_config, sound_label,
+                                  state["results"][selection[0]]["path"])
+                dialog.destroy()
+        
+        def browse():
+            dialog.destroy()
+            self.browse_sound_file(button_config, sound_label)
+        
+        for text, command in (("Choose", choose), ("Browse...", browse),
+                              ("Next ▶", lambda: change_page(1)),
+                              ("◀ Prev", lambda: change_page(-1))):
+            tk.Button(footer, text=text, command=command,
+                     bg='#39FF14' if text == "Choose" else '#3a3a3a',
+                     fg='black' if text == "Choose" else '#39FF14',
+                     font=('Arial', 9, 'bold'),
+                     relief=tk.FLAT, padx=10).pack(side=tk.RIGHT, padx=2)
+        
+        search_var.trace('w', on_query_changed)
+        listbox.bind('<Double-Button-1>', choose)
+        search_entry.bind('<Return>', choose)
+        dialog.bind('<Escape>', lambda e: dialog.destroy())
+        schedule_search(0)
+    
+    def browse_sound_file(self, button_config, sound_label):
         """Open file dialog to select sound file"""
         filetypes = (
             ('Audio files', '*.mp3 *.wav *.ogg'),
@@ -280,41 +607,62 @@ class SounDeckGUI:
         )
         
         if filename:
-            # Make path relative to project root
-            try:
-                rel_path = os.path.relpath(filename, Path(__file__).parent.parent)
-                button_config['sound'] = rel_path
-                sound_label.config(text=os.path.basename(filename))
-            except:
-                button_config['sound'] = filename
-                sound_label.config(text=os.path.basename(filename))
+            self.assign_sound(button_config, sound_label, filename)
+    
+    def assign_sound(self, button_config, sound_label, filename):
+        """Assign a sound file to a button"""
+        # Make path relative to project root
+        try:
+            rel_path = os.path.relpath(filename, Path(__file__).parent.parent)
+            button_config['sound'] = rel_path
+            sound_label.config(text=os.path.basename(filename))
+        except:
+            button_config['sound'] = filename
+            sound_label.config(text=os.path.basename(filename))
+        
+        # Apply live; the backend re-renders, then we refresh the waveform
+        button_id = button_config.get('id')
+        self.queue_edit(button_config, 'sound', button_config['sound'])
+        widgets = self.waveform_widgets.get(button_id)
+        if widgets:
+            widgets[0].delete('all')
+        self.root.after(1500, lambda: self.load_waveforms([button_id]))
     
     def kill_all_processes(self):
-        """Kill all SounDeck processes using the Python script"""
+        """Stop all SounDeck processes (except this window) through the supervisor"""
         result = messagebox.askyesno(
             "Kill SounDeck",
-            "This will kill ALL SounDeck processes.\n\nContinue?"
+            "This will stop ALL SounDeck processes.\n\nContinue?"
         )
         
         if not result:
             return
         
-        try:
-            kill_script = Path(__file__).parent / "kill_soundeck.py"
-            result = subprocess.run(
-                ['python', str(kill_script)],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
-            if result.returncode == 0:
-                messagebox.showinfo("Success", "All SounDeck processes killed successfully!")
+        # Graceful stops can take seconds per process; keep Tk responsive
+        def _stop():
+            try:
+                stopped = self.supervisor.stop_all(exclude_pid=os.getpid())
+            except Exception as e:
+                self.ui_queue.put(lambda err=e: messagebox.showerror("Error", f"Failed to kill processes: {err}"))
+                return
+            if stopped > 0:
+                self.ui_queue.put(lambda: messagebox.showinfo("Success", f"Stopped {stopped} SounDeck process(es)!"))
             else:
-                messagebox.showerror("Error", "Failed to kill some processes. Try again.")
-                
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to kill processes: {e}")
+                self.ui_queue.put(lambda: messagebox.showinfo("SounDeck", "No running SounDeck processes found."))
+        
+        threading.Thread(target=_stop, daemon=True).start()
+    
+    def restart_backend(self):
+        """Gracefully restart the backend so it picks up saved config"""
+        def _restart():
+            try:
+                pid = self.supervisor.restart("backend")
+            except Exception as e:
+                self.ui_queue.put(lambda err=e: messagebox.showerror("Error", f"Failed to restart backend: {err}"))
+                return
+            self.ui_queue.put(lambda: messagebox.showinfo("Backend", f"Backend restarted (PID {pid})"))
+        
+        threading.Thread(target=_restart, daemon=True).start()
     
     
     def get_local_ip(self):
@@ -368,6 +716,8 @@ class SounDeckGUI:
     
     def on_closing(self):
         """Handle window close event"""
+        self.backend_client.stop()
+        self.supervisor.unregister("gui")
         self.root.destroy()
 
 def main():
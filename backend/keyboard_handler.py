@@ -29,6 +29,10 @@ KEY_MAPPINGS = {
     keyboard.Key.f6: "f6",
     keyboard.Key.f7: "f7",
     keyboard.Key.f8: "f8",
+    keyboard.Key.f9: "f9",     # Free for profile hotkeys
+    keyboard.Key.f10: "f10",
+    keyboard.Key.f11: "f11",
+    keyboard.Key.f12: "f12",
 }
 
 
@@ -66,5 +70,5 @@ class KeyboardHandler:
         key_name = KEY_MAPPINGS.get(key)
         
         if key_name:
-            logger.debug(f"Key pressed: {key_name}")
+            logger.debug("Key pressed: %s", key_name)
             self.key_callback(key_name)
@@ -1,12 +1,28 @@
 """
 Kill all SounDeck related processes
-Emergency cleanup script - only kills processes from counter-deck folder
+Stops processes recorded by the supervisor; --scan falls back to the
+emergency process-table search (only kills processes from counter-deck folder)
 """
 import psutil
 import sys
 import os
 from pathlib import Path
 
+from supervisor import Supervisor
+
+
+def stop_soundeck_processes():
+    """Gracefully stop every SounDeck process recorded in the runtime file"""
+    print("[*] Stopping SounDeck processes recorded by the supervisor")
+    stopped = Supervisor().stop_all()
+    
+    if stopped > 0:
+        print(f"\n[+] Successfully stopped {stopped} SounDeck process(es)")
+    else:
+        print("\n[*] No running SounDeck processes recorded (use --scan to search)")
+    
+    return stopped
+
 def kill_soundeck_processes():
     """Find and kill all SounDeck-related processes from counter-deck folder"""
     killed_count = 0
@@ -64,7 +80,10 @@ def kill_soundeck_processes():
 
 if __name__ == "__main__":
     try:
-        killed = kill_soundeck_processes()
+        if "--scan" in sys.argv:
+            kill_soundeck_processes()
+        else:
+            stop_soundeck_processes()
         sys.exit(0)
     except Exception as e:
         print(f"\n[-] Error: {e}")
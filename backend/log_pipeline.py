@@ -0,0 +1,225 @@
+"""
+Non-blocking logging and press journal
+Hot-path calls only push onto a queue; a background thread does all I/O
+"""
+import logging
+import logging.handlers
+import os
+import queue
+import struct
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from threading import Thread, Event
+from typing import Callable, Iterator, List, Optional, Tuple
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+DEFAULT_JOURNAL_PATH = Path(__file__).parent / "logs" / "press_journal.bin"
+
+# Journal record: unix time (f64), source (u8), button id (u16)
+JOURNAL_RECORD = struct.Struct("<dBH")
+PRESS_SOURCES = ("keyboard", "app", "relay", "replay")
+MAX_BUTTON_ID = 0xFFFF
+
+# Longest pause a replay sleeps through (e.g. the hours between two sessions)
+MAX_REPLAY_GAP = 5.0
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(level: int = logging.INFO) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background writer
+
+    Args:
+        level: Root log level
+
+    Returns:
+        The running listener (call stop() on shutdown to flush)
+    """
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler(sys.stderr)
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, console, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+class PressJournal:
+    def __init__(self, path: Path = DEFAULT_JOURNAL_PATH, max_bytes: int = 1024 * 1024,
+                 backup_count: int = 5, summary_interval: float = 5.0):
+        """
+        Initialize press journal
+
+        Args:
+            path: Journal file (rotated to path.1, path.2, ...)
+            max_bytes: Rotate once the file grows past this size
+            backup_count: Number of rotated files to keep
+            summary_interval: Seconds between aggregated press log lines
+        """
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.summary_interval = summary_interval
+        self.logger = logging.getLogger("presses")
+
+        self._queue: "queue.SimpleQueue[Tuple[float, int, int]]" = queue.SimpleQueue()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        """Start the background writer"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush pending presses and stop the writer"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def record(self, source: str, button_id: int) -> None:
+        """
+        Record a press (hot path: a single queue push)
+
+        Presses that don't fit the journal format (unknown source, button ID
+        that isn't an integer 0-65535) are skipped rather than queued.
+
+        Args:
+            source: One of PRESS_SOURCES
+            button_id: Button ID from config
+        """
+        if source not in PRESS_SOURCES or not isinstance(button_id, int) \
+                or not 0 <= button_id <= MAX_BUTTON_ID:
+            return
+        self._queue.put((time.time(), PRESS_SOURCES.index(source), button_id))
+
+    def _drain(self) -> List[Tuple[float, int, int]]:
+        """Take everything currently queued"""
+        batch = []
+        try:
+            while True:
+                batch.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        return batch
+
+    def _rotate(self) -> None:
+        """Shift path -> path.1 -> path.2 ..., dropping the oldest"""
+        for index in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{index}")
+            if older.exists():
+                os.replace(older, self.path.with_name(f"{self.path.name}.{index + 1}"))
+        if self.path.exists():
+            os.replace(self.path, self.path.with_name(f"{self.path.name}.1"))
+
+    def _write(self, batch: List[Tuple[float, int, int]]) -> None:
+        """Append a batch of presses to the journal"""
+        if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+            self._rotate()
+        with open(self.path, 'ab') as f:
+            f.write(b"".join(JOURNAL_RECORD.pack(*press) for press in batch))
+
+    def _run(self) -> None:
+        """Writer loop: batch presses to disk and log periodic summaries"""
+        counts: Counter = Counter()
+        next_summary = time.monotonic() + self.summary_interval
+
+        while True:
+            stopping = self._stop.wait(0.25)
+            batch = self._drain()
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception as e:
+                    # Never let the writer die: record() would then queue forever
+                    self.logger.error("Failed to write press journal: %s", e)
+                counts.update((PRESS_SOURCES[source], button_id) for _, source, button_id in batch)
+
+            if counts and (stopping or time.monotonic() >= next_summary):
+                summary = ", ".join(f"{source} #{button_id} x{count}"
+                                    for (source, button_id), count in counts.most_common())
+                self.logger.info("Presses in last %gs: %s", self.summary_interval, summary)
+                counts.clear()
+            if time.monotonic() >= next_summary:
+                next_summary = time.monotonic() + self.summary_interval
+
+            if stopping:
+                return
+
+
+def read_journal(path: Path = DEFAULT_JOURNAL_PATH, backup_count: int = 5) -> Iterator[Tuple[float, str, int]]:
+    """
+    Read presses from the journal, oldest rotated file first
+
+    Yields:
+        (unix time, source, button id)
+    """
+    path = Path(path)
+    files = [path.with_name(f"{path.name}.{index}") for index in range(backup_count, 0, -1)]
+    files.append(path)
+    for file in files:
+        if not file.exists():
+            continue
+        data = file.read_bytes()
+        usable = len(data) - len(data) % JOURNAL_RECORD.size
+        for timestamp, source, button_id in JOURNAL_RECORD.iter_unpack(data[:usable]):
+            if source < len(PRESS_SOURCES):
+                yield timestamp, PRESS_SOURCES[source], button_id
+
+
+def replay_journal(press_callback: Callable[[int], None], path: Path = DEFAULT_JOURNAL_PATH,
+                   speed: float = 1.0, since: float = 0.0, max_gap: float = MAX_REPLAY_GAP,
+                   cancel: Event = None) -> int:
+    """
+    Re-trigger journaled presses with their original timing
+
+    Presses that were themselves replays are skipped, so replays don't pile up.
+
+    Args:
+        press_callback: Called with each button ID (e.g. handle_button_press)
+        path: Journal file
+        speed: Timing multiplier (2.0 replays twice as fast, 0 without delays)
+        since: Only replay presses at or after this unix time
+        max_gap: Longest pause between two presses, in replay seconds
+        cancel: Event that stops the replay when set
+
+    Returns:
+        Number of presses replayed
+    """
+    replayed = 0
+    previous = None
+    cancel = cancel or Event()
+    # Read everything first so presses journaled during the replay aren't replayed too
+    presses = [(timestamp, button_id) for timestamp, source, button_id in read_journal(path)
+               if timestamp >= since and source != "replay"]
+    for timestamp, button_id in presses:
+        if previous is not None and speed > 0:
+            if cancel.wait(min(max(0.0, (timestamp - previous) / speed), max_gap)):
+                break
+        if cancel.is_set():
+            break
+        previous = timestamp
+        press_callback(button_id)
+        replayed += 1
+    return replayed
+
+
+if __name__ == "__main__":
+    # Dump the journal: python log_pipeline.py [journal path]
+    journal = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_JOURNAL_PATH
+    for timestamp, source, button_id in read_journal(journal):
+        print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}  {source:8}  #{button_id}")
@@ -1,17 +1,21 @@
 """
 Lite-Deck Backend - FastAPI server with WebSocket support
 """
+import asyncio
+import atexit
 import json
 import os
 import logging
 import secrets
 import signal
 import sys
+import threading
 from pathlib import Path
 from typing import List, Dict, Any
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from fastapi.concurrency import run_in_threadpool
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
@@ -19,12 +23,17 @@ import uvicorn
 
 from audio_player import AudioPlayer
 from keyboard_handler import KeyboardHandler
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from supervisor import Supervisor
+from waveform import WaveformService
+from sound_library import SoundLibrary, DEFAULT_INDEX_PATH
+from log_pipeline import setup_logging, PressJournal, replay_journal, DEFAULT_JOURNAL_PATH
+from relay import Relay
+from playback_stream import PlaybackStream, DEFAULT_RATE_HZ
+from profiles import ProfileManager, config_for_disk, config_for_clients
+
+# Setup logging (queued; console I/O happens on a background thread)
+log_listener = setup_logging(logging.INFO)
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Rate limiting setup
@@ -47,16 +56,34 @@ app.add_middleware(
 
 # Global instances
 audio_player: AudioPlayer = None
+waveform_service: WaveformService = None
+sound_library: SoundLibrary = None
 keyboard_handler: KeyboardHandler = None
+playback_stream: PlaybackStream = None
+profile_manager: ProfileManager = None
+server_loop: asyncio.AbstractEventLoop = None
 config: Dict[str, Any] = {}
 connected_clients: List[WebSocket] = []
 API_KEY: str = ""
+uvicorn_server: uvicorn.Server = None
+relay: Relay = Relay([])
+supervisor = Supervisor()
+press_journal: PressJournal = None
+replay_thread: threading.Thread = None
+replay_cancel = threading.Event()
+
+# Per-run secret the supervisor uses for /shutdown and /reload (kept in the runtime file)
+CONTROL_TOKEN = secrets.token_urlsafe(32)
+CONTROL_PATHS = {"/shutdown", "/reload"}
+
+# SOUNDECK_CONFIG lets several local instances run side by side
+CONFIG_PATH = Path(os.environ.get("SOUNDECK_CONFIG") or Path(__file__).parent.parent / "config.json")
 
 
 
 def load_config() -> Dict[str, Any]:
     """Load configuration from config.json"""
-    config_path = Path(__file__).parent.parent / "config.json"
+    config_path = CONFIG_PATH
     
     if not config_path.exists():
         logger.error(f"Config file not found: {config_path}")
@@ -66,12 +93,135 @@ def load_config() -> Dict[str, Any]:
         return json.load(f)
 
 
-def save_config(config_data: Dict[str, Any]) -> None:
-    """Save configuration to config.json"""
-    config_path = Path(__file__).parent.parent / "config.json"
-    with open(config_path, 'w') as f:
-        json.dump(config_data, f, indent=2)
-    logger.info("Configuration saved")
+config_write_lock = threading.Lock()
+
+
+def save_config(config_data: Dict[str, Any], background: bool = False) -> None:
+    """
+    Save configuration to config.json
+    
+    Args:
+        config_data: Config to save
+        background: Serialize now but write the file on a background thread
+    """
+    text = json.dumps(config_for_disk(config_data), indent=2)
+    
+    def _write():
+        with config_write_lock:
+            tmp_path = CONFIG_PATH.with_suffix(".tmp")
+            with open(tmp_path, 'w') as f:
+                f.write(text)
+            os.replace(tmp_path, CONFIG_PATH)
+        logger.info("Configuration saved")
+    
+    if background:
+        threading.Thread(target=_write, daemon=True).start()
+    else:
+        _write()
+
+
+# Button fields the GUI may change live over /ws
+EDITABLE_BUTTON_FIELDS = {"name", "key", "sound", "icon", "effects", "targets"}
+
+
+def apply_config_edits(edits: List[Dict[str, Any]], profile: str = None) -> List[int]:
+    """
+    Apply batched button edits to the running config
+    
+    Args:
+        edits: [{"button_id": 1, "fields": {"name": "...", ...}}, ...]
+        profile: Profile the edits were made in (the active one if not given),
+            so edits queued before a profile switch don't land in the new one
+    
+    Returns:
+        IDs of buttons that changed
+    
+    Raises:
+        KeyError: Unknown profile
+    """
+    name = profile or profile_manager.active
+    buttons = {button.get("id"): button for button in profile_manager.profiles[name]["buttons"]}
+    changed = []
+    rerender = []
+    for edit in edits:
+        button = buttons.get(edit.get("button_id"))
+        fields = {k: v for k, v in (edit.get("fields") or {}).items() if k in EDITABLE_BUTTON_FIELDS}
+        if not button or not fields:
+            continue
+        button.update(fields)
+        changed.append(button["id"])
+        if "sound" in fields or "effects" in fields:
+            rerender.append(button)
+    
+    # Inactive profiles are rendered when they are pre-warmed or switched to
+    if rerender and name == profile_manager.active:
+        rerender = profile_manager.resolve(rerender, name)
+        prewarm_thread = audio_player.prewarm(rerender)
+        waveform_service.prewarm(rerender, after=prewarm_thread)
+    return changed
+
+
+async def broadcast_config(exclude: WebSocket = None) -> None:
+    """Push the current config to every connected client"""
+    for websocket in list(connected_clients):
+        if websocket is exclude:
+            continue
+        try:
+            await websocket.send_json({"type": "config", "data": config_for_clients(config)})
+        except Exception:
+            pass
+
+
+def switch_profile(name: str) -> bool:
+    """
+    Switch the active profile and tell every deck (safe from any thread)
+    
+    Sounds already playing keep their channels; only new presses use the
+    new profile's buttons and audio settings.
+    
+    Args:
+        name: Profile name
+    
+    Returns:
+        False if it was already active
+    
+    Raises:
+        KeyError: Unknown profile
+    """
+    if not profile_manager.switch(name):
+        return False
+    
+    prewarm_thread = profile_manager.prewarm()
+    waveform_service.prewarm(profile_manager.resolve(config["buttons"]), after=prewarm_thread)
+    save_config(config, background=True)
+    
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is server_loop:
+        server_loop.create_task(broadcast_config())
+    elif server_loop is not None:
+        asyncio.run_coroutine_threadsafe(broadcast_config(), server_loop)
+    return True
+
+
+def trigger_button(button: Dict[str, Any], source: str) -> None:
+    """
+    Play a button's sound and fan the press out to relay peers
+    
+    Args:
+        button: Button config
+        source: 'keyboard', 'app', 'relay' or 'replay' (relayed and replayed
+            presses play here only and are never forwarded)
+    """
+    press_journal.record(source, button.get("id", 0))
+    local_only = source in ("relay", "replay")
+    if not local_only:
+        relay.forward(button)
+    if local_only or relay.plays_locally(button):
+        audio_player.play_sound(button["sound"], profile_manager.effects_for(button),
+                                button_id=button.get("id"), volume=profile_manager.volume())
 
 
 def handle_key_press(key_name: str) -> None:
@@ -81,38 +231,71 @@ def handle_key_press(key_name: str) -> None:
     Args:
         key_name: The key identifier (e.g., 'num_0', 'f5')
     """
+    # Profile hotkeys take precedence over button keys
+    profile_name = profile_manager.hotkey_profile(key_name)
+    if profile_name:
+        switch_profile(profile_name)
+        return
+    
     # Find button with matching key
     for button in config.get("buttons", []):
         if button.get("key") == key_name and button.get("sound"):
-            logger.info(f"Playing sound for key: {key_name}")
-            audio_player.play_sound(button["sound"])
+            trigger_button(button, "keyboard")
             break
 
 
-def handle_button_press(button_id: int) -> None:
+def handle_button_press(button_id: int, relayed: bool = False) -> None:
     """
     Handle button press from Flutter app - play assigned sound
     
     Args:
         button_id: The button ID from config
+        relayed: True when the press was forwarded by another backend
     """
     # Find button with matching ID
     for button in config.get("buttons", []):
         if button.get("id") == button_id and button.get("sound"):
-            logger.info(f"Playing sound for button ID: {button_id}")
-            audio_player.play_sound(button["sound"])
+            trigger_button(button, "relay" if relayed else "app")
+            break
+
+
+def replay_press(button_id: int) -> None:
+    """Re-trigger a journaled press on this machine"""
+    for button in config.get("buttons", []):
+        if button.get("id") == button_id and button.get("sound"):
+            trigger_button(button, "replay")
             break
 
 
+def supervisor_name() -> str:
+    """Supervisor record name; extra local instances get their port appended"""
+    port = config.get("backend", {}).get("port", 8000)
+    return "backend" if "SOUNDECK_CONFIG" not in os.environ else f"backend:{port}"
+
+
+def instance_path(path: Path) -> Path:
+    """Data file for this instance; extra local instances get their port appended"""
+    if "SOUNDECK_CONFIG" not in os.environ:
+        return path
+    port = config.get("backend", {}).get("port", 8000)
+    return path.with_name(f"{path.stem}-{port}{path.suffix}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize components on startup"""
-    global audio_player, keyboard_handler, config, API_KEY
+    global audio_player, waveform_service, sound_library, keyboard_handler, relay, playback_stream, profile_manager, press_journal, server_loop, config, API_KEY
+    
+    server_loop = asyncio.get_running_loop()
     
     # Load configuration
     config = load_config()
     logger.info(f"Loaded config with {len(config.get('buttons', []))} buttons")
     
+    # Journal presses and log aggregated summaries off the hot path
+    press_journal = PressJournal(instance_path(DEFAULT_JOURNAL_PATH))
+    press_journal.start()
+    
     # Generate or load API key
     if "backend" not in config:
         config["backend"] = {}
@@ -133,20 +316,76 @@ async def startup_event():
     
     # Initialize audio player with device selection
     audio_player = AudioPlayer(base_path=str(Path(__file__).parent.parent), audio_device=audio_device)
-    logger.info("Audio player initialized")
+    profile_manager = ProfileManager(config, audio_player,
+                                     config["backend"].get("profile_prewarm_count", 2),
+                                     config["backend"].get("profile_prewarm_mb", 128))
+    prewarm_thread = profile_manager.prewarm()
+    waveform_service = WaveformService(audio_player)
+    waveform_service.prewarm(profile_manager.resolve(config["buttons"]), after=prewarm_thread)
+    logger.info(f"Audio player initialized (profile '{profile_manager.active}')")
+    
+    # Batched playback/level frames for subscribed clients
+    playback_stream = PlaybackStream(audio_player, config["backend"].get("meter_rate_hz", DEFAULT_RATE_HZ))
+    playback_stream.start()
+    
+    # Index sound library folders in the background (incremental)
+    project_dir = Path(__file__).parent.parent
+    library_folders = config["backend"].get("library_folders", ["backend/sounds"])
+    sound_library = SoundLibrary([project_dir / folder for folder in library_folders],
+                                 instance_path(DEFAULT_INDEX_PATH))
+    sound_library.start_scan()
+    logger.info(f"Sound library indexing {len(library_folders)} folder(s)")
     
     # Initialize and start keyboard handler
     keyboard_handler = KeyboardHandler(key_callback=handle_key_press)
     keyboard_handler.start()
     logger.info("Keyboard handler initialized and started")
+    
+    # Persistent connections to peer backends (multi-host decks)
+    relay = Relay(config["backend"].get("peers", []))
+    relay.start()
+    
+    # Record PID/port so the supervisor can stop us without scanning processes
+    try:
+        supervisor.register(supervisor_name(), port=config.get("backend", {}).get("port", 8000),
+                            token=CONTROL_TOKEN,
+                            config_path=str(CONFIG_PATH.resolve()) if "SOUNDECK_CONFIG" in os.environ else None)
+    except OSError as e:
+        logger.warning(f"Could not record backend in the runtime file: {e}")
     logger.info("✓ Backend startup complete")
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Cleanup on shutdown"""
+    """Cleanup on shutdown (reached via POST /shutdown, Ctrl+C or SIGTERM)"""
     if keyboard_handler:
         keyboard_handler.stop()
+    
+    # Close client sockets cleanly so apps reconnect instead of timing out
+    for websocket in list(connected_clients):
+        try:
+            await websocket.close(code=1001, reason="Server shutting down")
+        except Exception:
+            pass
+    connected_clients.clear()
+    
+    if playback_stream:
+        await playback_stream.stop()
+    
+    if audio_player:
+        audio_player.shutdown()
+    
+    if sound_library:
+        sound_library.close()
+    
+    await relay.stop()
+    try:
+        supervisor.unregister(supervisor_name())
+    except OSError as e:
+        logger.warning(f"Could not update the runtime file: {e}")
+    replay_cancel.set()
+    if press_journal:
+        press_journal.stop()
     logger.info("Backend shut down cleanly")
 
 
@@ -158,6 +397,9 @@ async def verify_api_key(request: Request) -> bool:
         token = auth_header[7:]
         if token == API_KEY:
             return True
+        # The supervisor's control token only unlocks stop/reload
+        if request.url.path in CONTROL_PATHS and secrets.compare_digest(token, CONTROL_TOKEN):
+            return True
     
     # Check query parameter (for WebSocket connections)
     api_key_param = request.query_params.get("api_key", "")
@@ -201,6 +443,21 @@ async def health():
     return {"status": "healthy", "version": "1.0.0"}
 
 
+@app.post("/shutdown")
+async def shutdown(request: Request):
+    """
+    Stop the server gracefully (requires auth)
+    
+    Used by the supervisor: signals can't reach a backend running in its
+    own console window on Windows.
+    """
+    if uvicorn_server is not None:
+        uvicorn_server.should_exit = True
+    else:
+        signal.raise_signal(signal.SIGINT)
+    return {"status": "shutting down"}
+
+
 @app.get("/config")
 @limiter.limit("10/minute")
 async def get_config(request: Request):
@@ -208,6 +465,134 @@ async def get_config(request: Request):
     return JSONResponse(content=config)
 
 
+@app.post("/reload")
+async def reload_config(request: Request):
+    """Reload config.json without restarting (requires auth)"""
+    global config, relay, profile_manager
+    new_config = load_config()
+    new_config.setdefault("backend", {})["api_key"] = API_KEY
+    new_profiles = ProfileManager(new_config, audio_player,
+                                  new_config["backend"].get("profile_prewarm_count", 2),
+                                  new_config["backend"].get("profile_prewarm_mb", 128))
+    # The old manager's speculative decodes would keep filling the cache
+    profile_manager.cancel_prewarm()
+    config, profile_manager = new_config, new_profiles
+    
+    await relay.stop()
+    relay = Relay(config["backend"].get("peers", []))
+    relay.start()
+    prewarm_thread = profile_manager.prewarm()
+    waveform_service.prewarm(profile_manager.resolve(config["buttons"]), after=prewarm_thread)
+    logger.info(f"Config reloaded with {len(config.get('buttons', []))} buttons")
+    
+    await broadcast_config()
+    
+    return {"status": "reloaded", "buttons": len(config.get("buttons", []))}
+
+
+@app.get("/waveform/{button_id}")
+@limiter.limit("120/minute")
+async def get_waveform(request: Request, button_id: int, bins: int = 0):
+    """
+    Get peak envelope and duration for a button's sound (requires auth)
+    
+    Returns the compact binary format from waveform.py; pass ?bins=N to
+    receive only the level closest to N bins.
+    """
+    button = next((b for b in config.get("buttons", []) if b.get("id") == button_id), None)
+    if not button or not button.get("sound"):
+        raise HTTPException(status_code=404, detail="Button has no sound")
+    
+    try:
+        data = await run_in_threadpool(
+            waveform_service.get_waveform, button["sound"], profile_manager.effects_for(button), bins
+        )
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Sound file not found")
+    
+    return Response(content=data, media_type="application/octet-stream")
+
+@app.get("/library/search")
+@limiter.limit("120/minute")
+async def search_library(request: Request, q: str = "", page: int = 0, page_size: int = 50):
+    """Prefix/fuzzy search of the indexed sound library (requires auth)"""
+    return await run_in_threadpool(sound_library.search, q, page, page_size)
+
+
+@app.post("/library/rescan")
+@limiter.limit("10/minute")
+async def rescan_library(request: Request):
+    """Incrementally rescan library folders in the background (requires auth)"""
+    if not sound_library.start_scan():
+        raise HTTPException(status_code=409, detail="Already scanning")
+    return {"status": "scanning"}
+
+
+@app.get("/library/duplicates")
+@limiter.limit("10/minute")
+async def library_duplicates(request: Request):
+    """Groups of library files with identical content (requires auth)"""
+    return {"duplicates": await run_in_threadpool(sound_library.duplicates)}
+
+
+@app.get("/relay/peers")
+@limiter.limit("60/minute")
+async def relay_peers(request: Request):
+    """Connection state and latency of relay peers (requires auth)"""
+    return {"peers": relay.stats()}
+
+
+@app.post("/journal/replay")
+@limiter.limit("10/minute")
+async def replay_presses(request: Request, speed: float = 1.0, since: float = 0.0):
+    """
+    Replay journaled presses with their original timing (requires auth)
+    
+    Presses play on this machine only. ?speed=2 replays twice as fast
+    (0 without delays); ?since=<unix time> skips older presses. Pauses
+    are capped at a few seconds; POST /journal/replay/stop cancels.
+    """
+    global replay_thread, replay_cancel
+    if replay_thread is not None and replay_thread.is_alive():
+        raise HTTPException(status_code=409, detail="A replay is already running")
+    
+    cancel = replay_cancel = threading.Event()
+    
+    def _replay():
+        count = replay_journal(replay_press, press_journal.path, speed=speed, since=since, cancel=cancel)
+        logger.info(f"Replayed {count} journaled presses")
+    
+    replay_thread = threading.Thread(target=_replay, daemon=True)
+    replay_thread.start()
+    return {"status": "replaying"}
+
+
+@app.post("/journal/replay/stop")
+@limiter.limit("10/minute")
+async def stop_replay(request: Request):
+    """Cancel a running replay (requires auth)"""
+    running = replay_thread is not None and replay_thread.is_alive()
+    replay_cancel.set()
+    return {"status": "stopped" if running else "idle"}
+
+
+@app.get("/profiles")
+@limiter.limit("60/minute")
+async def list_profiles(request: Request):
+    """Profile names, the active profile and what is being pre-warmed (requires auth)"""
+    return profile_manager.stats()
+
+
+@app.post("/profiles/{name}/activate")
+@limiter.limit("60/minute")
+async def activate_profile(request: Request, name: str):
+    """Switch the active profile (requires auth)"""
+    try:
+        switched = switch_profile(name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Unknown profile")
+    return {"status": "switched" if switched else "unchanged", "active": profile_manager.active}
+
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -228,7 +613,7 @@ async def websocket_endpoint(websocket: WebSocket):
     
     try:
         # Send initial config
-        await websocket.send_json({"type": "config", "data": config})
+        await websocket.send_json({"type": "config", "data": config_for_clients(config)})
         
         # Listen for messages
         while True:
@@ -236,15 +621,56 @@ async def websocket_endpoint(websocket: WebSocket):
             
             if data.get("type") == "button_press":
                 button_id = data.get("button_id")
-                logger.info(f"📱 Received button press from app: button_id={button_id}")
+                logger.debug("Received button press from app: button_id=%s", button_id)
                 if button_id:
-                    handle_button_press(button_id)
+                    handle_button_press(button_id, relayed=bool(data.get("relayed")))
+            
+            elif data.get("type") == "library_search":
+                results = await run_in_threadpool(
+                    sound_library.search,
+                    str(data.get("query", "")),
+                    int(data.get("page", 0)),
+                    int(data.get("page_size", 50)),
+                )
+                await websocket.send_json({"type": "library_results", "data": results})
+            
+            elif data.get("type") == "config_patch":
+                profile = data.get("active_profile") or profile_manager.active
+                try:
+                    changed = apply_config_edits(data.get("edits", []), profile)
+                except KeyError:
+                    await websocket.send_json({"type": "error", "message": "Unknown profile"})
+                    continue
+                await websocket.send_json({"type": "config_applied", "profile": profile, "button_ids": changed})
+                if changed and profile == profile_manager.active:
+                    await broadcast_config(exclude=websocket)
+            
+            elif data.get("type") == "preview":
+                if data.get("sound"):
+                    audio_player.play_sound(str(data["sound"]), data.get("effects"))
+            
+            elif data.get("type") == "subscribe_playback":
+                playback_stream.subscribe(websocket)
+            
+            elif data.get("type") == "unsubscribe_playback":
+                playback_stream.unsubscribe(websocket)
+            
+            elif data.get("type") == "switch_profile":
+                try:
+                    switch_profile(str(data.get("name", "")))
+                except KeyError:
+                    await websocket.send_json({"type": "error", "message": "Unknown profile"})
+            
+            elif data.get("type") == "ping":
+                await websocket.send_json({"type": "pong", "t": data.get("t")})
                     
     except WebSocketDisconnect:
+        playback_stream.unsubscribe(websocket)
         connected_clients.remove(websocket)
         logger.info(f"Client disconnected. Total clients: {len(connected_clients)}")
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
+        playback_stream.unsubscribe(websocket)
         if websocket in connected_clients:
             connected_clients.remove(websocket)
 
@@ -252,6 +678,8 @@ async def websocket_endpoint(websocket: WebSocket):
 if __name__ == "__main__":
     import sys
     
+    config = load_config()
+    
     # Check for headless mode
     headless = "--headless" in sys.argv or config.get("backend", {}).get("headless", False)
     
@@ -264,4 +692,7 @@ if __name__ == "__main__":
     logger.info(f"Starting Lite-Deck backend on {host}:{port}")
     logger.info(f"Headless mode: {headless}")
     
-    uvicorn.run(app, host=host, port=port, log_level="warning" if headless else "info")
+    # log_config=None keeps uvicorn's loggers on our queued handler
+    uvicorn_server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_config=None,
+                                                   log_level="warning" if headless else "info"))
+    uvicorn_server.run()
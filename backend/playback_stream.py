@@ -0,0 +1,162 @@
+"""
+Playback state and level-meter streaming to /ws clients
+Each tick produces one delta-encoded frame, serialized once for all subscribers
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Any, Optional, Set
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_HZ = 30
+
+# Values are sent as integers 0-255 so tiny changes don't produce frames
+QUANTIZE = 255
+
+
+def _quantize(value: float) -> int:
+    return int(round(min(max(value, 0.0), 1.0) * QUANTIZE))
+
+
+class PlaybackStream:
+    def __init__(self, audio_player, rate_hz: float = DEFAULT_RATE_HZ):
+        """
+        Initialize playback stream
+
+        Args:
+            audio_player: AudioPlayer providing playback_snapshot()
+            rate_hz: Frames per second sent to subscribers
+
+        Frames look like:
+            {"type": "playback", "seq": 12, "progress": {"3": 140},
+             "stopped": [5], "levels": [rms, peak]}
+        where progress/levels are 0-255 and only changed fields are sent.
+        A frame with "key": true carries the full state.
+        A client still writing an earlier frame skips ticks and then gets a
+        fresh keyframe, so slow clients never stall the others or freeze.
+        """
+        self.audio_player = audio_player
+        self.interval = 1.0 / max(rate_hz, 1)
+        self.subscribers: Set[WebSocket] = set()
+        # New clients (and ones that fell behind) wait here for a keyframe
+        self._joining: Set[WebSocket] = set()
+        # Each client's frame still being written; never more than one per client
+        self._sending: Dict[WebSocket, asyncio.Task] = {}
+
+        self._seq = 0
+        self._progress: Dict[int, int] = {}
+        self._levels = [0, 0]
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start ticking (call from the server's event loop)"""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop ticking"""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in self._sending.values():
+            task.cancel()
+        self._sending.clear()
+        self.subscribers.clear()
+        self._joining.clear()
+
+    def subscribe(self, websocket: WebSocket) -> None:
+        """
+        Add a client
+
+        Its first frame is a keyframe built on the next tick, from the same
+        snapshot as that tick's delta, so it is never stale and no delta is
+        missed between the two.
+        """
+        if websocket not in self.subscribers:
+            self._joining.add(websocket)
+
+    def unsubscribe(self, websocket: WebSocket) -> None:
+        """Remove a client"""
+        self.subscribers.discard(websocket)
+        self._joining.discard(websocket)
+        self._sending.pop(websocket, None)
+
+    def _keyframe(self) -> str:
+        """Full current state (for new subscribers)"""
+        return json.dumps({
+            "type": "playback", "seq": self._seq, "key": True,
+            "progress": {str(k): v for k, v in self._progress.items()},
+            "levels": self._levels,
+        }, separators=(",", ":"))
+
+    def _delta(self) -> Optional[str]:
+        """Advance state and encode what changed since the last tick"""
+        snapshot = self.audio_player.playback_snapshot()
+        progress = {button_id: _quantize(value) for button_id, value in snapshot["progress"].items()}
+        levels = [_quantize(snapshot["rms"]), _quantize(snapshot["peak"])]
+
+        changed = {str(k): v for k, v in progress.items() if self._progress.get(k) != v}
+        stopped = [k for k in self._progress if k not in progress]
+        levels_changed = levels != self._levels
+
+        self._progress = progress
+        self._levels = levels
+        if not (changed or stopped or levels_changed):
+            return None
+
+        self._seq += 1
+        frame: Dict[str, Any] = {"type": "playback", "seq": self._seq}
+        if changed:
+            frame["progress"] = changed
+        if stopped:
+            frame["stopped"] = stopped
+        if levels_changed:
+            frame["levels"] = levels
+        return json.dumps(frame, separators=(",", ":"))
+
+    async def _run(self) -> None:
+        """Tick loop: one snapshot and one encode per tick, regardless of client count"""
+        next_tick = time.monotonic()
+        while True:
+            next_tick += self.interval
+            await asyncio.sleep(max(0.0, next_tick - time.monotonic()))
+            if not (self.subscribers or self._joining):
+                next_tick = time.monotonic()
+                continue
+
+            try:
+                text = self._delta()
+            except Exception as e:
+                logger.error("Playback snapshot failed: %s", e)
+                continue
+
+            keyframe = None
+            for websocket in list(self.subscribers | self._joining):
+                pending = self._sending.get(websocket)
+                if pending is not None and not pending.done():
+                    # Still writing an earlier frame: skip this one, then resync with a keyframe
+                    if text is not None:
+                        self.subscribers.discard(websocket)
+                        self._joining.add(websocket)
+                    continue
+                if websocket in self._joining:
+                    keyframe = keyframe or self._keyframe()
+                    frame = keyframe
+                    self._joining.discard(websocket)
+                    self.subscribers.add(websocket)
+                elif text is not None:
+                    frame = text
+                else:
+                    continue
+                self._sending[websocket] = asyncio.ensure_future(self._send(websocket, frame))
+
+    async def _send(self, websocket: WebSocket, text: str) -> None:
+        """Send one frame; clients whose socket fails are dropped"""
+        try:
+            await websocket.send_text(text)
+        except Exception:
+            self.unsubscribe(websocket)
@@ -0,0 +1,187 @@
+"""
+Named button profiles with background pre-warming
+A switch swaps the active button list in one assignment; playing sounds are untouched
+"""
+import logging
+from collections import Counter
+from threading import Event, Lock, Thread
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE = "default"
+
+# Likely-next profiles decoded ahead of time, and their shared memory budget
+DEFAULT_PREWARM_COUNT = 2
+DEFAULT_PREWARM_MB = 128
+
+
+class ProfileManager:
+    def __init__(self, config: Dict[str, Any], audio_player, prewarm_count: int = DEFAULT_PREWARM_COUNT,
+                 prewarm_budget_mb: int = DEFAULT_PREWARM_MB):
+        """
+        Initialize profile manager
+
+        The config is normalized in place. Top-level 'buttons' is always the
+        active profile's button list (the same list object as in 'profiles'),
+        so code and tools that only know 'buttons' keep working. Each
+        profile may set:
+            buttons: Button list (key mappings live on the buttons)
+            audio: {"volume": 0-1, "effects": default effects for its buttons}
+            hotkey: Key name that switches to this profile (e.g. 'f9')
+
+        Args:
+            config: Loaded config.json (gets 'profiles' and 'active_profile')
+            audio_player: AudioPlayer used for pre-warming
+            prewarm_count: How many likely-next profiles to decode in the background
+            prewarm_budget_mb: Memory budget for those speculative decodes
+        """
+        self.config = config
+        self.audio_player = audio_player
+        self.prewarm_count = prewarm_count
+        self.prewarm_budget = prewarm_budget_mb * 1024 * 1024
+
+        profiles = config.get("profiles") or {}
+        active = config.get("active_profile")
+        if active not in profiles:
+            active = next(iter(profiles), DEFAULT_PROFILE)
+        # Top-level buttons win for the active profile (the GUI edits them there),
+        # unless there are none and the profile carries its own
+        active_profile = profiles.setdefault(active, {})
+        if config.get("buttons") or not active_profile.get("buttons"):
+            active_profile["buttons"] = config.get("buttons") or []
+        for profile in profiles.values():
+            profile.setdefault("buttons", [])
+        config["profiles"] = profiles
+        config["active_profile"] = active
+        config["buttons"] = profiles[active]["buttons"]
+
+        # (from, to) -> number of switches, for guessing the next profile
+        self._transitions: Counter = Counter()
+        self._lock = Lock()
+        self._prewarm_cancel: Optional[Event] = None
+
+    @property
+    def profiles(self) -> Dict[str, Dict[str, Any]]:
+        return self.config["profiles"]
+
+    @property
+    def active(self) -> str:
+        return self.config["active_profile"]
+
+    def audio_settings(self, name: str = None) -> Dict[str, Any]:
+        """A profile's audio settings (the active profile by default)"""
+        return self.profiles.get(name or self.active, {}).get("audio") or {}
+
+    def volume(self) -> float:
+        """Active profile's playback volume"""
+        return float(self.audio_settings().get("volume", 1.0))
+
+    def effects_for(self, button: Dict[str, Any], name: str = None) -> Dict[str, Any]:
+        """Button effects layered over its profile's default effects"""
+        defaults = self.audio_settings(name).get("effects") or {}
+        return {**defaults, **(button.get("effects") or {})}
+
+    def resolve(self, buttons: List[Dict[str, Any]], name: str = None) -> List[Dict[str, Any]]:
+        """Buttons with profile default effects applied, as they will be played"""
+        if not self.audio_settings(name).get("effects"):
+            return buttons
+        return [{**button, "effects": self.effects_for(button, name)} for button in buttons]
+
+    def hotkey_profile(self, key_name: str) -> Optional[str]:
+        """Profile bound to a hotkey, if any"""
+        for name, profile in self.profiles.items():
+            if profile.get("hotkey") == key_name:
+                return name
+        return None
+
+    def switch(self, name: str) -> bool:
+        """
+        Make a profile active (safe from any thread); call prewarm() afterwards
+
+        Args:
+            name: Profile name
+
+        Returns:
+            False if it was already active
+
+        Raises:
+            KeyError: Unknown profile
+        """
+        with self._lock:
+            if name not in self.profiles:
+                raise KeyError(name)
+            previous = self.active
+            if name == previous:
+                return False
+            self._transitions[(previous, name)] += 1
+            # Readers grab config["buttons"] once per press, so this swap is atomic for them
+            self.config["active_profile"] = name
+            self.config["buttons"] = self.profiles[name]["buttons"]
+
+        logger.info("Switched profile '%s' -> '%s'", previous, name)
+        return True
+
+    def likely_next(self) -> List[str]:
+        """Profiles most likely to be switched to next, best guess first"""
+        names = list(self.profiles)
+        active = self.active
+        others = [name for name in names if name != active]
+        # Past switches from here first, then neighbours in declaration order
+        index = names.index(active)
+        nearby = {name: min((names.index(name) - index) % len(names),
+                            (index - names.index(name)) % len(names)) for name in others}
+        others.sort(key=lambda name: (-self._transitions[(active, name)], nearby[name]))
+        return others[:self.prewarm_count]
+
+    def prewarm(self) -> Thread:
+        """
+        Keep the active profile hot and speculatively decode the likely next ones
+
+        Returns:
+            The active profile's prewarm thread (speculative work runs after it)
+        """
+        self.cancel_prewarm()
+        cancel = self._prewarm_cancel = Event()
+
+        # Active profile first: promotes its sounds so speculation never evicts them
+        active_thread = self.audio_player.prewarm(self.resolve(self.config["buttons"]), cancel=cancel)
+        upcoming = []
+        for name in self.likely_next():
+            upcoming.extend(self.resolve(self.profiles[name]["buttons"], name))
+        if upcoming:
+            self.audio_player.prewarm(upcoming, budget_bytes=self.prewarm_budget,
+                                      cancel=cancel, after=active_thread)
+        return active_thread
+
+    def cancel_prewarm(self) -> None:
+        """Stop any running pre-warm pass (e.g. before this manager is replaced)"""
+        if self._prewarm_cancel is not None:
+            self._prewarm_cancel.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Profile names, active profile and pre-warm targets"""
+        return {
+            "active": self.active,
+            "profiles": [{"name": name, "buttons": len(profile["buttons"]), "hotkey": profile.get("hotkey")}
+                         for name, profile in self.profiles.items()],
+            "prewarming": self.likely_next(),
+        }
+
+
+def config_for_disk(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Config as written to config.json: the active profile's buttons only at top level"""
+    profiles = config.get("profiles")
+    active = config.get("active_profile")
+    if not profiles or active not in profiles:
+        return config
+    stored = dict(profiles)
+    stored[active] = {k: v for k, v in profiles[active].items() if k != "buttons"}
+    return {**config, "profiles": stored}
+
+
+def config_for_clients(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Config sent to decks: inactive profiles reduced to their names"""
+    if "profiles" not in config:
+        return config
+    return {**config, "profiles": list(config["profiles"])}
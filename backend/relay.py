@@ -0,0 +1,178 @@
+"""
+Multi-host relay: forward presses to peer backends
+Each peer keeps one persistent WebSocket connection with latency tracking
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+# Seconds between latency pings, and reconnect backoff bounds
+PING_INTERVAL = 5.0
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 10.0
+
+# Button target meaning "play on this machine"
+LOCAL_TARGET = "local"
+
+
+class RelayPeer:
+    def __init__(self, name: str, host: str, port: int, api_key: str):
+        """
+        Initialize a relay peer
+
+        Args:
+            name: Peer name used in button 'targets'
+            host: Peer backend host
+            port: Peer backend port
+            api_key: Peer backend API key
+        """
+        self.name = name
+        self.url = f"ws://{host}:{port}/ws?api_key={api_key}"
+        self.display_url = f"ws://{host}:{port}/ws"
+        self.connection: Optional[websockets.WebSocketClientProtocol] = None
+        self.latency_ms: Optional[float] = None
+        self.sent = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        """Keep a connection open, reconnecting with backoff"""
+        backoff = RECONNECT_MIN
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None,
+                                              open_timeout=3, close_timeout=1) as connection:
+                    self.connection = connection
+                    backoff = RECONNECT_MIN
+                    logger.info("Relay peer '%s' connected (%s)", self.name, self.display_url)
+                    pinger = asyncio.create_task(self._measure_latency(connection))
+                    try:
+                        # Drain config/status messages the peer sends us
+                        async for _ in connection:
+                            pass
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                logger.debug("Relay peer '%s' unavailable: %s", self.name, e)
+            finally:
+                if self.connection is not None:
+                    logger.warning("Relay peer '%s' disconnected", self.name)
+                self.connection = None
+                self.latency_ms = None
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX)
+
+    async def _measure_latency(self, connection) -> None:
+        """Ping the peer periodically, keeping a smoothed round-trip time"""
+        while True:
+            started = time.perf_counter()
+            try:
+                pong = await connection.ping()
+                await asyncio.wait_for(pong, timeout=PING_INTERVAL)
+            except (asyncio.TimeoutError, websockets.WebSocketException):
+                return
+            rtt = (time.perf_counter() - started) * 1000
+            self.latency_ms = rtt if self.latency_ms is None else 0.8 * self.latency_ms + 0.2 * rtt
+            await asyncio.sleep(PING_INTERVAL)
+
+    async def send_press(self, button_id: int) -> bool:
+        """Forward a press; returns False if the peer is unreachable"""
+        connection = self.connection
+        if connection is None:
+            self.failed += 1
+            return False
+        try:
+            await connection.send(json.dumps(
+                {"type": "button_press", "button_id": button_id, "relayed": True}))
+            self.sent += 1
+            return True
+        except websockets.WebSocketException:
+            self.failed += 1
+            return False
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection and latency stats for this peer"""
+        return {
+            "name": self.name,
+            "url": self.display_url,
+            "connected": self.connection is not None,
+            "latency_ms": round(self.latency_ms, 2) if self.latency_ms is not None else None,
+            "sent": self.sent,
+            "failed": self.failed,
+        }
+
+
+class Relay:
+    def __init__(self, peers_config: List[Dict[str, Any]]):
+        """
+        Initialize relay
+
+        Args:
+            peers_config: 'peers' list from the backend config
+                (name, host, port, api_key per peer)
+        """
+        self.peers: Dict[str, RelayPeer] = {}
+        for index, peer in enumerate(peers_config or []):
+            name = peer.get("name") or f"peer{index + 1}"
+            self.peers[name] = RelayPeer(name, peer["host"], peer.get("port", 8000),
+                                         peer.get("api_key", ""))
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Open peer connections (call from the server's event loop)"""
+        self.loop = asyncio.get_running_loop()
+        self._tasks = [self.loop.create_task(peer.run()) for peer in self.peers.values()]
+        if self.peers:
+            logger.info("Relay enabled for %d peer(s): %s", len(self.peers), ", ".join(self.peers))
+
+    async def stop(self) -> None:
+        """Close all peer connections"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def targets(self, button: Dict[str, Any]) -> List[str]:
+        """A button's targets; defaults to this machine plus every peer"""
+        return button.get("targets") or [LOCAL_TARGET, *self.peers]
+
+    def plays_locally(self, button: Dict[str, Any]) -> bool:
+        """Whether a button should play on this machine"""
+        return LOCAL_TARGET in self.targets(button)
+
+    def forward(self, button: Dict[str, Any]) -> None:
+        """
+        Fan a press out to the button's peer targets (safe from any thread)
+
+        Args:
+            button: Button config that was pressed
+        """
+        peers = [self.peers[name] for name in self.targets(button) if name in self.peers]
+        if not peers or self.loop is None:
+            return
+        coroutine = self._fan_out(peers, button.get("id", 0))
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self.loop.create_task(coroutine)
+        else:
+            asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    async def _fan_out(self, peers: List[RelayPeer], button_id: int) -> None:
+        """Send one press to several peers concurrently"""
+        await asyncio.gather(*(peer.send_press(button_id) for peer in peers))
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Stats for every peer"""
+        return [peer.stats() for peer in self.peers.values()]
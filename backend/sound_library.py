@@ -0,0 +1,268 @@
+"""
+Incremental sound library index backed by SQLite
+Rescans only touch files whose size or mtime changed
+"""
+import os
+import sqlite3
+import wave
+from pathlib import Path
+from threading import Lock, Thread
+from typing import Dict, Any, List, Optional
+
+import pygame
+
+from audio_effects import source_hash
+
+AUDIO_EXTENSIONS = {".mp3", ".wav", ".ogg", ".flac"}
+
+DEFAULT_INDEX_PATH = Path(__file__).parent / "sounds" / ".cache" / "library.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    folder TEXT NOT NULL,
+    name TEXT NOT NULL,
+    name_lower TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    duration_ms INTEGER,
+    format TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_files_name ON files(name_lower);
+CREATE INDEX IF NOT EXISTS idx_files_hash ON files(hash);
+CREATE INDEX IF NOT EXISTS idx_files_folder ON files(folder);
+"""
+
+
+def probe_duration(path: Path) -> Optional[int]:
+    """
+    Get a sound's duration in milliseconds
+
+    WAV headers are read directly; other formats are decoded with pygame
+    when the mixer is available, otherwise the duration stays unknown.
+    """
+    try:
+        if path.suffix.lower() == ".wav":
+            with wave.open(str(path), 'rb') as w:
+                return int(w.getnframes() * 1000 / w.getframerate())
+        if pygame.mixer.get_init():
+            return int(pygame.mixer.Sound(str(path)).get_length() * 1000)
+    except (pygame.error, wave.Error, EOFError, OSError, ZeroDivisionError):
+        pass
+    return None
+
+
+def _like_escape(text: str) -> str:
+    """Escape LIKE wildcards in user input"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _glob_escape(text: str) -> str:
+    """Escape GLOB wildcards in user input"""
+    return "".join(f"[{c}]" if c in "*?[" else c for c in text)
+
+
+class SoundLibrary:
+    def __init__(self, folders: List[str], index_path: Path = DEFAULT_INDEX_PATH):
+        """
+        Initialize sound library
+
+        Args:
+            folders: Folders to index (searched recursively)
+            index_path: SQLite index file
+        """
+        self.folders = [Path(folder).resolve() for folder in folders]
+        self.index_path = Path(index_path)
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = Lock()
+        self._db = sqlite3.connect(str(self.index_path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        # WAL lets the GUI read while the backend rescans
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        # Held for a whole scan, so only one runs at a time
+        self._scan_lock = Lock()
+        self.scanning = False
+
+    def close(self) -> None:
+        """Close the index"""
+        with self._lock:
+            self._db.close()
+
+    def _walk(self, folder: Path):
+        """Yield (path, stat) for every audio file under a folder"""
+        stack = [folder]
+        while stack:
+            try:
+                entries = list(os.scandir(stack.pop()))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif os.path.splitext(entry.name)[1].lower() in AUDIO_EXTENSIONS:
+                    try:
+                        yield Path(entry.path), entry.stat()
+                    except OSError:
+                        continue
+
+    def scan(self) -> Optional[Dict[str, int]]:
+        """
+        Incrementally rescan all folders
+
+        Only the backend scans (it has the mixer needed to probe non-WAV
+        durations); unchanged files whose duration is still unknown are
+        re-probed.
+
+        Returns:
+            Counts of added, updated, removed and unchanged files, or None
+            if a scan is already running
+        """
+        if not self._scan_lock.acquire(blocking=False):
+            return None
+        return self._run_scan()
+
+    def start_scan(self) -> bool:
+        """
+        Rescan on a background thread
+
+        Returns:
+            False if a scan is already running
+        """
+        if not self._scan_lock.acquire(blocking=False):
+            return False
+        Thread(target=self._run_scan, daemon=True).start()
+        return True
+
+    def _run_scan(self) -> Dict[str, int]:
+        """Scan every folder (call with _scan_lock acquired; releases it)"""
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        self.scanning = True
+        try:
+            for folder in self.folders:
+                self._scan_folder(folder, stats)
+        finally:
+            self.scanning = False
+            self._scan_lock.release()
+        return stats
+
+    def _scan_folder(self, folder: Path, stats: Dict[str, int]) -> None:
+        """Rescan one folder, updating stats in place"""
+        with self._lock:
+            known = {
+                row["path"]: (row["size"], row["mtime_ns"], row["duration_ms"])
+                for row in self._db.execute(
+                    "SELECT path, size, mtime_ns, duration_ms FROM files WHERE folder = ?",
+                    (str(folder),))
+            }
+
+        seen = set()
+        changes = []
+        durations = []
+        for path, stat in self._walk(folder):
+            key = str(path)
+            seen.add(key)
+            previous = known.get(key)
+            if previous and previous[:2] == (stat.st_size, stat.st_mtime_ns):
+                stats["unchanged"] += 1
+                if previous[2] is None and pygame.mixer.get_init():
+                    duration = probe_duration(path)
+                    if duration is not None:
+                        durations.append((duration, key))
+                continue
+            try:
+                digest = source_hash(path)
+            except OSError:
+                continue
+            tags = ",".join(part.lower() for part in path.relative_to(folder).parts[:-1])
+            changes.append((
+                key, str(folder), path.stem, path.stem.lower(),
+                stat.st_size, stat.st_mtime_ns, probe_duration(path),
+                path.suffix.lower().lstrip("."), tags, digest,
+            ))
+            stats["updated" if previous else "added"] += 1
+
+        removed = [(path,) for path in known if path not in seen]
+        stats["removed"] += len(removed)
+
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                changes)
+            self._db.executemany("UPDATE files SET duration_ms = ? WHERE path = ?", durations)
+            self._db.executemany("DELETE FROM files WHERE path = ?", removed)
+
+    def search(self, query: str, page: int = 0, page_size: int = 50) -> Dict[str, Any]:
+        """
+        Prefix/fuzzy search by name and tags
+
+        Prefix matches rank first, then substring, then tag, then
+        subsequence ("fuzzy") matches.
+
+        Args:
+            query: Search text (empty lists everything)
+            page: Zero-based page number
+            page_size: Results per page
+
+        Returns:
+            Dict with total count, page info and result rows
+        """
+        text = query.strip().lower()
+        page = max(page, 0)
+        page_size = min(max(page_size, 1), 500)
+
+        prefix = _glob_escape(text) + "*"
+        substring = f"%{_like_escape(text)}%"
+        fuzzy = "%" + "%".join(_like_escape(c) for c in text) + "%"
+
+        where = "name_lower LIKE :fuzzy ESCAPE '\\' OR tags LIKE :substring ESCAPE '\\'"
+        params = {"prefix": prefix, "substring": substring, "fuzzy": fuzzy,
+                  "limit": page_size, "offset": page * page_size}
+
+        with self._lock:
+            total = self._db.execute(
+                f"SELECT COUNT(*) FROM files WHERE {where}", params).fetchone()[0]
+            rows = self._db.execute(f"""
+                SELECT path, name, duration_ms, format, tags, hash,
+                       CASE
+                           WHEN name_lower GLOB :prefix THEN 0
+                           WHEN name_lower LIKE :substring ESCAPE '\\' THEN 1
+                           WHEN tags LIKE :substring ESCAPE '\\' THEN 2
+                           ELSE 3
+                       END AS rank
+                FROM files
+                WHERE {where}
+                ORDER BY rank, name_lower
+                LIMIT :limit OFFSET :offset
+            """, params).fetchall()
+
+        return {
+            "query": query,
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "indexing": self.scanning,
+            "results": [
+                {key: row[key] for key in ("path", "name", "duration_ms", "format", "tags", "hash")}
+                for row in rows
+            ],
+        }
+
+    def duplicates(self) -> List[List[str]]:
+        """Groups of paths that share identical content"""
+        with self._lock:
+            rows = self._db.execute("""
+                SELECT hash, path FROM files
+                WHERE hash IN (SELECT hash FROM files GROUP BY hash HAVING COUNT(*) > 1)
+                ORDER BY hash, path
+            """).fetchall()
+
+        groups: Dict[str, List[str]] = {}
+        for row in rows:
+            groups.setdefault(row["hash"], []).append(row["path"])
+        return list(groups.values())
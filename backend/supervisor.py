@@ -0,0 +1,328 @@
+"""
+Process supervisor for the SounDeck backend and GUI
+Tracks PIDs and ports in a runtime file so stop/restart/reload never scan the process table
+"""
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+import psutil
+
+BACKEND_DIR = Path(__file__).parent.resolve()
+PROJECT_DIR = BACKEND_DIR.parent
+RUNTIME_FILE = PROJECT_DIR / ".soundeck_runtime.json"
+
+# A lock file older than this was left by a process that died mid-update
+LOCK_STALE_SECONDS = 5.0
+
+# Managed components and the script each one runs
+COMPONENTS = {
+    "backend": "main.py",
+    "gui": "gui_config.py",
+}
+
+
+class Supervisor:
+    def __init__(self, runtime_file: Path = RUNTIME_FILE):
+        """
+        Initialize supervisor
+
+        Args:
+            runtime_file: JSON file holding PID/port records for running components
+        """
+        self.runtime_file = Path(runtime_file)
+
+    def _read(self) -> Dict[str, Any]:
+        """Read runtime records (empty if missing or corrupt)"""
+        try:
+            with open(self.runtime_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, records: Dict[str, Any]) -> None:
+        """Write runtime records atomically (call with _locked held)"""
+        if not records:
+            try:
+                self.runtime_file.unlink()
+            except OSError:
+                pass
+            return
+        # Unique temp name: the backend and the GUI both write this file
+        tmp_path = self.runtime_file.with_name(f"{self.runtime_file.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(records, f, indent=2)
+        for attempt in range(10):
+            try:
+                os.replace(tmp_path, self.runtime_file)
+                return
+            except PermissionError:
+                # Windows refuses while another process has the file open for reading
+                time.sleep(0.02)
+        os.replace(tmp_path, self.runtime_file)
+
+    @contextmanager
+    def _locked(self):
+        """Serialize read-modify-write of the runtime file across processes"""
+        lock_path = self.runtime_file.with_name(f"{self.runtime_file.name}.lock")
+        while True:
+            try:
+                fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except (FileExistsError, PermissionError):
+                try:
+                    if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                        lock_path.unlink()
+                except OSError:
+                    pass
+                time.sleep(0.01)
+        try:
+            yield
+        finally:
+            os.close(fd)
+            try:
+                lock_path.unlink()
+            except OSError:
+                pass
+
+    def register(self, name: str, pid: int = None, port: int = None, token: str = None,
+                 config_path: str = None) -> None:
+        """
+        Record a running component (called by the component itself on startup)
+
+        Args:
+            name: Component name ('backend', 'backend:<port>' or 'gui')
+            pid: Process ID (defaults to the current process)
+            port: Listening port, if any
+            token: Per-run secret accepted by the component's /shutdown and /reload
+            config_path: SOUNDECK_CONFIG the component runs with, so it can be restarted
+        """
+        with self._locked():
+            records = self._read()
+            records[name] = {
+                "pid": pid or os.getpid(),
+                "port": port,
+                "token": token,
+                "script": COMPONENTS.get(name.split(":")[0], ""),
+                "config": config_path,
+                "started_at": time.time(),
+            }
+            self._write(records)
+
+    def unregister(self, name: str, pid: int = None) -> None:
+        """Remove a component record, only if it still belongs to the given PID"""
+        with self._locked():
+            records = self._read()
+            record = records.get(name)
+            if record and record.get("pid") == (pid or os.getpid()):
+                del records[name]
+                self._write(records)
+
+    def get_process(self, name: str) -> Optional[psutil.Process]:
+        """
+        Look up the live process for a component
+
+        Returns None if there is no record, the PID is gone, or the PID
+        was reused by an unrelated process.
+        """
+        record = self._read().get(name)
+        if not record:
+            return None
+        try:
+            proc = psutil.Process(record["pid"])
+            script = record.get("script")
+            if script and not any(script in str(arg) for arg in proc.cmdline()):
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied, KeyError):
+            return None
+
+    def is_running(self, name: str) -> bool:
+        """Check whether a component is running"""
+        return self.get_process(name) is not None
+
+    def start(self, name: str, config_path: str = None) -> int:
+        """
+        Start a component if it isn't already running
+
+        Args:
+            name: Component name ('backend', 'backend:<port>' or 'gui')
+            config_path: SOUNDECK_CONFIG for the new process (defaults to the
+                one recorded for this name)
+
+        Returns:
+            PID of the running component
+
+        Raises:
+            ValueError: An extra instance whose config file isn't known
+        """
+        proc = self.get_process(name)
+        if proc:
+            return proc.pid
+
+        config_path = config_path or (self._read().get(name) or {}).get("config")
+        env = dict(os.environ)
+        env.pop("SOUNDECK_CONFIG", None)
+        if config_path:
+            env["SOUNDECK_CONFIG"] = config_path
+        elif ":" in name:
+            # Without its config this would just be a second default backend
+            raise ValueError(f"Don't know the config for {name}; start it with SOUNDECK_CONFIG set")
+
+        kwargs = {}
+        if sys.platform == "win32":
+            # New process group so we can deliver CTRL_BREAK for graceful shutdown
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        child = subprocess.Popen(
+            [sys.executable, str(BACKEND_DIR / COMPONENTS[name.split(":")[0]])],
+            cwd=str(BACKEND_DIR),
+            env=env,
+            **kwargs
+        )
+        # The component re-registers itself with its port once it is up
+        self.register(name, pid=child.pid, config_path=config_path)
+        return child.pid
+
+    def _control(self, name: str, path: str, timeout: float = 2.0) -> bool:
+        """
+        POST to a component's control endpoint with its recorded token
+
+        Args:
+            name: Component name
+            path: Endpoint path ('/shutdown' or '/reload')
+            timeout: HTTP timeout in seconds
+
+        Returns:
+            True if the component acknowledged the request
+        """
+        record = self._read().get(name) or {}
+        if not record.get("port") or not record.get("token"):
+            return False
+        request = urllib.request.Request(
+            f"http://127.0.0.1:{record['port']}{path}",
+            method="POST",
+            headers={"Authorization": f"Bearer {record['token']}"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status == 200
+        except OSError:
+            return False
+
+    def stop(self, name: str, timeout: float = 5.0) -> bool:
+        """
+        Stop a component gracefully, falling back to a hard kill
+
+        Components with a control endpoint are asked over HTTP first: on
+        Windows a CTRL_BREAK only reaches processes sharing our console, and
+        the launchers start the backend in a console of its own.
+
+        Args:
+            name: Component name
+            timeout: Seconds to wait for a graceful exit before killing
+
+        Returns:
+            True if a process was stopped
+        """
+        proc = self.get_process(name)
+        if proc is None:
+            self.unregister(name, pid=self._read().get(name, {}).get("pid"))
+            return False
+
+        pid = proc.pid
+        try:
+            if not self._control(name, "/shutdown"):
+                if sys.platform == "win32":
+                    os.kill(pid, signal.CTRL_BREAK_EVENT)
+                else:
+                    proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=timeout)
+        except psutil.TimeoutExpired:
+            proc.kill()
+            proc.wait(timeout=3)
+        except (psutil.NoSuchProcess, OSError):
+            pass
+
+        self.unregister(name, pid=pid)
+        return True
+
+    def restart(self, name: str, timeout: float = 5.0) -> int:
+        """Stop then start a component, returning the new PID"""
+        # Stopping drops the record, so keep the config it was started with
+        config_path = (self._read().get(name) or {}).get("config")
+        if ":" in name and not config_path:
+            raise ValueError(f"Don't know the config for {name}; start it with SOUNDECK_CONFIG set")
+        self.stop(name, timeout=timeout)
+        return self.start(name, config_path=config_path)
+
+    def reload(self, name: str = "backend", timeout: float = 2.0) -> bool:
+        """
+        Ask a running backend to reload its config without restarting
+
+        Args:
+            name: Component name ('backend' or 'backend:<port>')
+            timeout: HTTP timeout in seconds
+
+        Returns:
+            True if the backend acknowledged the reload
+        """
+        if not self.is_running(name):
+            return False
+        return self._control(name, "/reload", timeout=timeout)
+
+    def stop_all(self, exclude_pid: int = None, timeout: float = 5.0) -> int:
+        """
+        Stop every recorded component
+
+        Args:
+            exclude_pid: PID to leave running (e.g. the caller's own GUI)
+            timeout: Graceful shutdown timeout per component
+
+        Returns:
+            Number of processes stopped
+        """
+        stopped = 0
+        for name, record in self._read().items():
+            if exclude_pid is not None and record.get("pid") == exclude_pid:
+                continue
+            if self.stop(name, timeout=timeout):
+                stopped += 1
+        return stopped
+
+
+if __name__ == "__main__":
+    # python supervisor.py start|stop|restart|reload|status [component]
+    command = sys.argv[1] if len(sys.argv) > 1 else "status"
+    component = sys.argv[2] if len(sys.argv) > 2 else "backend"
+    supervisor = Supervisor()
+
+    if command in ("start", "restart"):
+        try:
+            if command == "start":
+                print(f"{component} running (PID {supervisor.start(component)})")
+            else:
+                print(f"{component} restarted (PID {supervisor.restart(component)})")
+        except ValueError as e:
+            print(e)
+            sys.exit(1)
+    elif command == "stop":
+        print(f"{component} stopped" if supervisor.stop(component) else f"{component} was not running")
+    elif command == "reload":
+        if not supervisor.reload(component):
+            print(f"{component} did not reload (not running?)")
+            sys.exit(1)
+        print(f"{component} reloaded its config")
+    elif command == "status":
+        for name, record in supervisor._read().items():
+            state = "running" if supervisor.is_running(name) else "stale"
+            print(f"{name:16} PID {record.get('pid'):<8} port {record.get('port') or '-':<6} {state}")
+    else:
+        print("Usage: python supervisor.py start|stop|restart|reload|status [component]")
+        sys.exit(2)
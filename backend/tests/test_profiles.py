@@ -0,0 +1,80 @@
+from profiles import ProfileManager, config_for_disk
+
+
+class FakeAudioPlayer:
+    def __init__(self):
+        self.prewarmed = []
+
+    def prewarm(self, buttons, budget_bytes=None, cancel=None, after=None):
+        self.prewarmed.append(buttons)
+
+
+def button(button_id, sound):
+    return {"id": button_id, "name": f"Button {button_id}", "sound": sound}
+
+
+def test_top_level_buttons_belong_to_active_profile():
+    cs2 = [button(1, "cs2.mp3")]
+    stream = [button(1, "stream.mp3")]
+    config = {
+        "active_profile": "cs2",
+        "profiles": {"cs2": {"hotkey": "f9"}, "stream": {"hotkey": "f10", "buttons": stream}},
+        "buttons": cs2,
+    }
+    manager = ProfileManager(config, FakeAudioPlayer())
+
+    assert manager.active == "cs2"
+    assert config["buttons"] is config["profiles"]["cs2"]["buttons"]
+    assert config["buttons"] == cs2
+    assert config["profiles"]["stream"]["buttons"] == stream
+
+
+def test_buttons_defined_only_under_profiles():
+    stream = [button(1, "stream.mp3"), button(2, "clip.mp3")]
+    config = {
+        "active_profile": "stream",
+        "profiles": {"cs2": {"buttons": [button(1, "cs2.mp3")]}, "stream": {"buttons": stream}},
+    }
+    ProfileManager(config, FakeAudioPlayer())
+
+    assert config["buttons"] == stream
+    assert config["buttons"] is config["profiles"]["stream"]["buttons"]
+
+
+def test_empty_top_level_does_not_wipe_active_profile():
+    stream = [button(1, "stream.mp3")]
+    config = {"active_profile": "stream", "profiles": {"stream": {"buttons": stream}}, "buttons": []}
+    ProfileManager(config, FakeAudioPlayer())
+
+    assert config["buttons"] == stream
+
+
+def test_switch_and_disk_round_trip():
+    config = {
+        "active_profile": "cs2",
+        "profiles": {"cs2": {}, "stream": {"buttons": [button(1, "stream.mp3")]}},
+        "buttons": [button(1, "cs2.mp3")],
+    }
+    manager = ProfileManager(config, FakeAudioPlayer())
+    assert manager.switch("stream")
+    assert config["buttons"][0]["sound"] == "stream.mp3"
+
+    stored = config_for_disk(config)
+    assert "buttons" not in stored["profiles"]["stream"]
+    assert stored["profiles"]["cs2"]["buttons"][0]["sound"] == "cs2.mp3"
+
+    # Loading what was written restores the same profiles
+    reloaded = ProfileManager(stored, FakeAudioPlayer())
+    assert reloaded.active == "stream"
+    assert stored["buttons"][0]["sound"] == "stream.mp3"
+    assert stored["profiles"]["cs2"]["buttons"][0]["sound"] == "cs2.mp3"
+
+
+def test_cancel_prewarm_stops_running_pass():
+    player = FakeAudioPlayer()
+    config = {"active_profile": "cs2", "profiles": {"cs2": {}}, "buttons": [button(1, "cs2.mp3")]}
+    manager = ProfileManager(config, player)
+    manager.prewarm()
+    cancel = manager._prewarm_cancel
+    manager.cancel_prewarm()
+    assert cancel.is_set()
@@ -0,0 +1,233 @@
+"""
+Waveform peak envelopes and durations for GUI and phone previews
+Peaks are computed once per rendered sound and stored next to the sound cache
+"""
+import logging
+import os
+import struct
+from pathlib import Path
+from threading import Thread, Lock, get_ident
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pygame
+
+from audio_effects import normalize_effects
+
+logger = logging.getLogger(__name__)
+
+# Binary format (little endian):
+#   header: magic "SDWF", version u8, level count u8, reserved u16,
+#           duration_ms u32, sample_rate u32
+#   per level: bin count u16, then one u8 peak (0-255 of full scale) per bin
+WAVEFORM_MAGIC = b"SDWF"
+WAVEFORM_VERSION = 1
+HEADER = struct.Struct("<4sBBHII")
+LEVEL_HEADER = struct.Struct("<H")
+
+# Peak resolutions, finest last; each level is a 4x reduction of the next
+LEVEL_BINS = (32, 128, 512, 2048)
+
+# Level-meter envelope windows per second of audio
+METER_RATE = 100
+
+
+def compute_levels(samples: np.ndarray) -> List[np.ndarray]:
+    """
+    Compute multi-resolution peak envelopes from a PCM buffer
+
+    Args:
+        samples: Integer PCM array, shape (frames,) or (frames, channels)
+
+    Returns:
+        One uint8 array per entry in LEVEL_BINS
+    """
+    finest = LEVEL_BINS[-1]
+    full_scale = np.iinfo(samples.dtype).max
+    frames = np.abs(samples.reshape(len(samples), -1).astype(np.int32)).max(axis=1)
+
+    # Pad to a whole number of bins, then take the max of each bin
+    per_bin = max(1, -(-len(frames) // finest))
+    padded = np.zeros(per_bin * finest, dtype=np.int32)
+    padded[:len(frames)] = frames
+    peaks = padded.reshape(finest, per_bin).max(axis=1)
+    peaks = np.minimum(peaks * 255 // full_scale, 255).astype(np.uint8)
+
+    levels = [peaks]
+    for bins in reversed(LEVEL_BINS[:-1]):
+        levels.insert(0, levels[0].reshape(bins, -1).max(axis=1))
+    return levels
+
+
+def compute_meter_envelope(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Compute RMS and peak per 1/METER_RATE second window for live meters
+
+    Args:
+        samples: Integer PCM array, shape (frames,) or (frames, channels)
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        uint8 array of shape (windows, 2): RMS, peak (0-255 of full scale)
+    """
+    window = max(1, sample_rate // METER_RATE)
+    full_scale = float(np.iinfo(samples.dtype).max)
+    audio = samples.reshape(len(samples), -1)
+    windows = max(1, -(-len(audio) // window))
+
+    padded = np.zeros((windows * window, audio.shape[1]), dtype=np.float32)
+    padded[:len(audio)] = audio
+    blocks = padded.reshape(windows, -1) / full_scale
+
+    rms = np.sqrt(np.mean(blocks * blocks, axis=1))
+    peak = np.abs(blocks).max(axis=1)
+    return (np.clip(np.stack([rms, peak], axis=1), 0, 1) * 255).astype(np.uint8)
+
+
+def encode(duration_ms: int, sample_rate: int, levels: List[np.ndarray]) -> bytes:
+    """Pack peak levels into the compact binary format"""
+    parts = [HEADER.pack(WAVEFORM_MAGIC, WAVEFORM_VERSION, len(levels), 0,
+                         duration_ms, sample_rate)]
+    for peaks in levels:
+        parts.append(LEVEL_HEADER.pack(len(peaks)))
+        parts.append(peaks.tobytes())
+    return b"".join(parts)
+
+
+def decode(data: bytes) -> Tuple[int, List[bytes]]:
+    """
+    Unpack the binary format
+
+    Returns:
+        (duration_ms, list of peak byte strings, coarsest first)
+
+    Raises:
+        ValueError: If the data isn't a complete SounDeck waveform
+    """
+    try:
+        magic, version, count, _, duration_ms, _ = HEADER.unpack_from(data)
+        if magic != WAVEFORM_MAGIC or version != WAVEFORM_VERSION:
+            raise ValueError("Not a SounDeck waveform")
+        offset = HEADER.size
+        levels = []
+        for _ in range(count):
+            (bins,) = LEVEL_HEADER.unpack_from(data, offset)
+            offset += LEVEL_HEADER.size
+            if offset + bins > len(data):
+                raise ValueError("Truncated waveform")
+            levels.append(data[offset:offset + bins])
+            offset += bins
+    except struct.error as e:
+        raise ValueError(f"Truncated waveform: {e}") from e
+    if not levels:
+        raise ValueError("Waveform has no levels")
+    return duration_ms, levels
+
+
+def select_level(data: bytes, bins: int) -> bytes:
+    """
+    Reduce a waveform to the single level closest to the requested bin count
+
+    Args:
+        data: Encoded waveform with all levels
+        bins: Desired number of bins (0 keeps every level)
+    """
+    if bins <= 0:
+        return data
+    magic, version, count, _, duration_ms, sample_rate = HEADER.unpack_from(data)
+    _, levels = decode(data)
+    best = min(levels, key=lambda peaks: abs(len(peaks) - bins))
+    return (HEADER.pack(magic, version, 1, 0, duration_ms, sample_rate)
+            + LEVEL_HEADER.pack(len(best)) + best)
+
+
+class WaveformService:
+    def __init__(self, audio_player):
+        """
+        Initialize waveform service
+
+        Args:
+            audio_player: AudioPlayer used to decode/render sounds and locate the cache
+        """
+        self.audio_player = audio_player
+        self._waveforms: Dict[str, bytes] = {}
+        self._lock = Lock()
+
+    def get_waveform(self, sound_path: str, effects: Dict[str, Any] = None,
+                     bins: int = 0) -> bytes:
+        """
+        Get the encoded waveform for a button's sound as it will be played
+
+        Args:
+            sound_path: Configured sound path (relative or absolute)
+            effects: Button effect settings (affect duration and levels)
+            bins: Desired bin count, 0 for every level
+
+        Raises:
+            FileNotFoundError: If the sound file doesn't exist
+        """
+        effects = normalize_effects(effects)
+        full_path = self.audio_player.resolve_path(sound_path)
+        if not full_path.exists():
+            raise FileNotFoundError(str(full_path))
+
+        key = self.audio_player.cache_key(full_path, effects)
+        with self._lock:
+            data = self._waveforms.get(key)
+
+        if data is None:
+            cache_path = self.audio_player.cache_dir / f"{key}.wf"
+            data = self._read_cached(cache_path)
+            if data is None:
+                data = self._compute(full_path, effects)
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}-{get_ident()}.tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, cache_path)
+            with self._lock:
+                self._waveforms[key] = data
+
+        return select_level(data, bins)
+
+    @staticmethod
+    def _read_cached(cache_path: Path) -> Optional[bytes]:
+        """Read a cached waveform; missing or unreadable files count as a miss"""
+        try:
+            data = cache_path.read_bytes()
+            decode(data)
+            return data
+        except (OSError, ValueError):
+            return None
+
+    def _compute(self, full_path: Path, effects: Dict[str, Any]) -> bytes:
+        """Decode (via the player's cache) and encode peaks for one sound"""
+        sound = self.audio_player.get_sound(full_path, effects)
+        samples = pygame.sndarray.array(sound)
+        sample_rate = pygame.mixer.get_init()[0]
+        duration_ms = int(len(samples) * 1000 / sample_rate)
+        return encode(duration_ms, sample_rate, compute_levels(samples))
+
+    def prewarm(self, buttons: List[Dict[str, Any]], after: Optional[Thread] = None) -> Thread:
+        """
+        Compute waveforms for every configured button in the background
+
+        Args:
+            buttons: Button configs from config.json
+            after: Thread to wait for first (e.g. the audio prewarm)
+        """
+        def _prewarm():
+            if after:
+                after.join()
+            for button in buttons:
+                if not button.get("sound"):
+                    continue
+                try:
+                    self.get_waveform(button["sound"], button.get("effects"))
+                except FileNotFoundError:
+                    pass
+                except Exception as e:
+                    logger.error("Error computing waveform for %s: %s", button['sound'], e)
+
+        thread = Thread(target=_prewarm, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,33 @@
+class PlaybackState {
+  // Button ID -> progress 0..1 for buttons that are currently playing
+  final Map<int, double> progress = {};
+  double rms = 0;
+  double peak = 0;
+  int seq = 0;
+
+  // Applies a 'playback' frame from the backend (see backend/playback_stream.py).
+  // Frames only carry what changed; a frame with "key": true is the full state.
+  void apply(Map<String, dynamic> frame) {
+    if (frame['key'] == true) {
+      progress.clear();
+    }
+    seq = frame['seq'] as int? ?? seq;
+    final changed = frame['progress'] as Map<String, dynamic>?;
+    changed?.forEach((id, value) {
+      progress[int.parse(id)] = (value as num) / 255;
+    });
+    final stopped = frame['stopped'] as List?;
+    stopped?.forEach((id) => progress.remove(id));
+    final levels = frame['levels'] as List?;
+    if (levels != null && levels.length == 2) {
+      rms = (levels[0] as num) / 255;
+      peak = (levels[1] as num) / 255;
+    }
+  }
+
+  void clear() {
+    progress.clear();
+    rms = 0;
+    peak = 0;
+  }
+}
@@ -0,0 +1,27 @@
+import 'dart:typed_data';
+
+class WaveformData {
+  final Duration duration;
+  final Uint8List peaks;
+
+  WaveformData({
+    required this.duration,
+    required this.peaks,
+  });
+
+  // Parses the backend's compact binary format (see backend/waveform.py).
+  // Only the first level is read; request a single level with ?bins=N.
+  factory WaveformData.fromBytes(Uint8List bytes) {
+    if (bytes.length < 18 ||
+        String.fromCharCodes(bytes.sublist(0, 4)) != 'SDWF') {
+      throw const FormatException('Not a SounDeck waveform');
+    }
+    final data = ByteData.sublistView(bytes);
+    final durationMs = data.getUint32(8, Endian.little);
+    final bins = data.getUint16(16, Endian.little);
+    return WaveformData(
+      duration: Duration(milliseconds: durationMs),
+      peaks: bytes.sublist(18, 18 + bins),
+    );
+  }
+}
@@ -3,6 +3,7 @@ import 'package:flutter/material.dart';
 import 'package:shared_preferences/shared_preferences.dart';
 import '../models/button_config.dart';
 import '../services/websocket_service.dart';
+import '../widgets/level_meter.dart';
 import '../widgets/sound_button.dart';
 import '../widgets/soundeck_logo.dart';
 import 'browser_screen.dart';
@@ -133,6 +134,8 @@ class _HomeScreenState extends State<HomeScreen> {
               style: TextStyle(color: Color(0xFF39FF14)),
             ),
             const Spacer(),
+            LevelMeter(stream: _webSocketService.playbackStream),
+            const SizedBox(width: 8),
             Container(
               padding: const EdgeInsets.symmetric(horizontal: 12, vertical: 6),
               decoration: BoxDecoration(
@@ -174,6 +177,23 @@ class _HomeScreenState extends State<HomeScreen> {
           ],
         ),
         actions: [
+          if (_webSocketService.profiles.length > 1)
+            PopupMenuButton<String>(
+              icon: const Icon(Icons.layers, color: Color(0xFF39FF14)),
+              tooltip: 'Profile: ${_webSocketService.activeProfile}',
+              color: Colors.grey.shade900,
+              onSelected: _webSocketService.switchProfile,
+              itemBuilder: (context) => _webSocketService.profiles
+                  .map((name) => CheckedPopupMenuItem<String>(
+                        value: name,
+                        checked: name == _webSocketService.activeProfile,
+                        child: Text(
+                          name,
+                          style: const TextStyle(color: Colors.white),
+                        ),
+                      ))
+                  .toList(),
+            ),
           IconButton(
             icon: const Icon(Icons.language, color: Color(0xFF39FF14)),
             onPressed: () {
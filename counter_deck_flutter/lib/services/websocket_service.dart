@@ -1,13 +1,18 @@
 import 'dart:async';
 import 'dart:convert';
+import 'dart:io';
 import 'package:web_socket_channel/web_socket_channel.dart';
 import '../models/button_config.dart';
+import '../models/playback_state.dart';
+import '../models/waveform_data.dart';
 import 'app_logger.dart';
 
 class WebSocketService {
   final AppLogger _logger = AppLogger();
   WebSocketChannel? _channel;
   String _serverUrl = '';
+  String _host = '';
+  int _port = 0;
   String _apiKey = '';
   bool _isConnected = false;
   final StreamController<List<ButtonConfig>> _configController =
@@ -16,14 +21,22 @@ class WebSocketService {
       StreamController<bool>.broadcast();
   final StreamController<String> _errorController =
       StreamController<String>.broadcast();
+  final StreamController<PlaybackState> _playbackController =
+      StreamController<PlaybackState>.broadcast();
+  final PlaybackState playback = PlaybackState();
+  List<String> profiles = [];
+  String activeProfile = '';
 
   Stream<List<ButtonConfig>> get configStream => _configController.stream;
   Stream<bool> get connectionStream => _connectionController.stream;
   Stream<String> get errorStream => _errorController.stream;
+  Stream<PlaybackState> get playbackStream => _playbackController.stream;
   bool get isConnected => _isConnected;
 
   void connect(String host, int port, String apiKey) {
     _serverUrl = 'ws://$host:$port/ws';
+    _host = host;
+    _port = port;
     _apiKey = apiKey;
     _logger.info('Attempting connection to: $_serverUrl');
     _attemptConnection();
@@ -42,6 +55,9 @@ class WebSocketService {
       _connectionController.add(true);
       _logger.info('✓ WebSocket connected successfully');
 
+      // Live progress/levels; the backend replies with a full keyframe first
+      _channel!.sink.add(jsonEncode({'type': 'subscribe_playback'}));
+
       _channel!.stream.listen(
         (message) {
           _logger.debug(
@@ -85,11 +101,19 @@ class WebSocketService {
   void _handleMessage(dynamic message) {
     try {
       final data = jsonDecode(message);
+      if (data['type'] == 'playback') {
+        // Up to 30 frames/s, so skip the per-message debug logging
+        playback.apply(data);
+        _playbackController.add(playback);
+        return;
+      }
       _logger.debug('Message type: ${data['type']}');
       if (data['type'] == 'config') {
         final buttons = (data['data']['buttons'] as List)
             .map((b) => ButtonConfig.fromJson(b))
             .toList();
+        profiles = List<String>.from(data['data']['profiles'] ?? const []);
+        activeProfile = data['data']['active_profile'] ?? '';
         _logger.info('Received config with ${buttons.length} buttons');
         _configController.add(buttons);
       }
@@ -110,6 +134,15 @@ class WebSocketService {
     }
   }
 
+  void switchProfile(String name) {
+    if (_isConnected && _channel != null) {
+      _logger.info('Switching profile to $name');
+      _channel!.sink.add(
+        jsonEncode({'type': 'switch_profile', 'name': name}),
+      );
+    }
+  }
+
   void sendIconChangeRequest(int buttonId) {
     if (_isConnected && _channel != null) {
       _channel!.sink.add(
@@ -126,10 +159,38 @@ class WebSocketService {
     }
   }
 
+  Future<WaveformData?> fetchWaveform(int buttonId, {int bins = 64}) async {
+    if (_host.isEmpty) return null;
+    final client = HttpClient();
+    try {
+      final request = await client.getUrl(
+        Uri.parse('http://$_host:$_port/waveform/$buttonId?bins=$bins'),
+      );
+      request.headers.set('Authorization', 'Bearer $_apiKey');
+      final response = await request.close();
+      if (response.statusCode != 200) {
+        await response.drain<void>();
+        return null;
+      }
+      final builder = BytesBuilder(copy: false);
+      await for (final chunk in response) {
+        builder.add(chunk);
+      }
+      return WaveformData.fromBytes(builder.takeBytes());
+    } catch (e) {
+      _logger.warning('Failed to fetch waveform for button $buttonId: $e');
+      return null;
+    } finally {
+      client.close();
+    }
+  }
+
   void disconnect() {
     _logger.info('Disconnecting WebSocket');
     _isConnected = false;
     _connectionController.add(false);
+    playback.clear();
+    _playbackController.add(playback);
     _channel?.sink.close();
   }
 
@@ -138,5 +199,6 @@ class WebSocketService {
     _configController.close();
     _connectionController.close();
     _errorController.close();
+    _playbackController.close();
   }
 }
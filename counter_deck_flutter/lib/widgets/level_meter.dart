@@ -0,0 +1,58 @@
+import 'package:flutter/material.dart';
+import '../models/playback_state.dart';
+
+// Backend output level: RMS bar with a peak tick
+class LevelMeter extends StatelessWidget {
+  final Stream<PlaybackState> stream;
+
+  const LevelMeter({Key? key, required this.stream}) : super(key: key);
+
+  @override
+  Widget build(BuildContext context) {
+    return RepaintBoundary(
+      child: StreamBuilder<PlaybackState>(
+        stream: stream,
+        builder: (context, snapshot) {
+          final playback = snapshot.data;
+          return CustomPaint(
+            size: const Size(48, 10),
+            painter: _LevelPainter(playback?.rms ?? 0, playback?.peak ?? 0),
+          );
+        },
+      ),
+    );
+  }
+}
+
+class _LevelPainter extends CustomPainter {
+  final double rms;
+  final double peak;
+
+  _LevelPainter(this.rms, this.peak);
+
+  @override
+  void paint(Canvas canvas, Size size) {
+    final radius = Radius.circular(size.height / 2);
+    canvas.drawRRect(
+      RRect.fromRectAndRadius(Offset.zero & size, radius),
+      Paint()..color = const Color(0x3339FF14),
+    );
+    canvas.drawRRect(
+      RRect.fromRectAndRadius(
+          Rect.fromLTWH(0, 0, size.width * rms, size.height), radius),
+      Paint()..color = const Color(0xFF39FF14),
+    );
+    final x = size.width * peak;
+    canvas.drawLine(
+      Offset(x, 0),
+      Offset(x, size.height),
+      Paint()
+        ..color = peak > 0.95 ? Colors.red : Colors.white
+        ..strokeWidth = 2,
+    );
+  }
+
+  @override
+  bool shouldRepaint(_LevelPainter oldDelegate) =>
+      oldDelegate.rms != rms || oldDelegate.peak != peak;
+}
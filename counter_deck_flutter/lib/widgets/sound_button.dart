@@ -1,7 +1,10 @@
+import 'dart:async';
 import 'dart:convert';
 import 'dart:typed_data';
 import 'package:flutter/material.dart';
 import '../models/button_config.dart';
+import '../models/playback_state.dart';
+import '../models/waveform_data.dart';
 import '../services/websocket_service.dart';
 
 class SoundButton extends StatefulWidget {
@@ -20,11 +23,31 @@ class SoundButton extends StatefulWidget {
 
 class _SoundButtonState extends State<SoundButton> {
   Uint8List? _iconBytes;
+  WaveformData? _waveform;
+  double? _progress;
+  StreamSubscription<PlaybackState>? _playbackSub;
 
   @override
   void initState() {
     super.initState();
     _loadIcon();
+    _loadWaveform();
+    _playbackSub =
+        widget.webSocketService.playbackStream.listen(_onPlayback);
+  }
+
+  @override
+  void dispose() {
+    _playbackSub?.cancel();
+    super.dispose();
+  }
+
+  void _onPlayback(PlaybackState playback) {
+    // Only rebuild when this button's own progress changed
+    final progress = playback.progress[widget.config.id];
+    if (progress != _progress && mounted) {
+      setState(() => _progress = progress);
+    }
   }
 
   @override
@@ -33,6 +56,19 @@ class _SoundButtonState extends State<SoundButton> {
     if (oldWidget.config.icon != widget.config.icon) {
       _loadIcon();
     }
+    if (oldWidget.config.sound != widget.config.sound) {
+      _loadWaveform();
+    }
+  }
+
+  Future<void> _loadWaveform() async {
+    _waveform = null;
+    if (widget.config.sound.isEmpty) return;
+    final waveform =
+        await widget.webSocketService.fetchWaveform(widget.config.id);
+    if (mounted && waveform != null) {
+      setState(() => _waveform = waveform);
+    }
   }
 
   void _loadIcon() {
@@ -128,27 +164,83 @@ class _SoundButtonState extends State<SoundButton> {
             ),
             borderRadius: BorderRadius.circular(8),
           ),
-          child: hasIcon
-              ? ClipRRect(
-                  borderRadius: BorderRadius.circular(6),
-                  child: Image.memory(
-                    _iconBytes!,
-                    fit: BoxFit.cover,
-                  ),
-                )
-              : Center(
-                  child: Text(
-                    widget.config.name,
-                    textAlign: TextAlign.center,
-                    style: TextStyle(
-                      color: hasSound ? const Color(0xFF39FF14) : Colors.grey,
-                      fontSize: 12,
-                      fontWeight: FontWeight.bold,
-                    ),
+          child: Stack(
+            children: [
+              Positioned.fill(child: _buildFace(hasSound, hasIcon)),
+              if (_progress != null)
+                Positioned(
+                  left: 0,
+                  right: 0,
+                  bottom: 0,
+                  child: LinearProgressIndicator(
+                    value: _progress,
+                    minHeight: 3,
+                    backgroundColor: Colors.transparent,
+                    color: const Color(0xFF39FF14),
                   ),
                 ),
+            ],
+          ),
         ),
       ),
     );
   }
+
+  Widget _buildFace(bool hasSound, bool hasIcon) {
+    if (hasIcon) {
+      return ClipRRect(
+        borderRadius: BorderRadius.circular(6),
+        child: Image.memory(
+          _iconBytes!,
+          fit: BoxFit.cover,
+        ),
+      );
+    }
+    return Stack(
+      children: [
+        if (_waveform != null)
+          Positioned.fill(
+            child: CustomPaint(
+              painter: _WaveformPainter(_waveform!.peaks),
+            ),
+          ),
+        Center(
+          child: Text(
+            widget.config.name,
+            textAlign: TextAlign.center,
+            style: TextStyle(
+              color: hasSound ? const Color(0xFF39FF14) : Colors.grey,
+              fontSize: 12,
+              fontWeight: FontWeight.bold,
+            ),
+          ),
+        ),
+      ],
+    );
+  }
+}
+
+class _WaveformPainter extends CustomPainter {
+  final Uint8List peaks;
+
+  _WaveformPainter(this.peaks);
+
+  @override
+  void paint(Canvas canvas, Size size) {
+    if (peaks.isEmpty) return;
+    final paint = Paint()
+      ..color = const Color(0x3339FF14)
+      ..strokeWidth = size.width / peaks.length;
+    final middle = size.height / 2;
+    final step = size.width / peaks.length;
+    for (var i = 0; i < peaks.length; i++) {
+      final half = peaks[i] / 255 * middle;
+      final x = i * step + step / 2;
+      canvas.drawLine(Offset(x, middle - half), Offset(x, middle + half), paint);
+    }
+  }
+
+  @override
+  bool shouldRepaint(_WaveformPainter oldDelegate) =>
+      oldDelegate.peaks != peaks;
 }